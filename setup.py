@@ -66,13 +66,21 @@ setup(
     zip_safe=False,
     tests_require=['pytest>=3.0.0', 'pytest-pylint', 'coverage'],
     install_requires=['pyqt5==5.7', 'requests>=2.0.0'],
+    extras_require={
+        'analysis': ['numpy']
+    },
     entry_points={
         'console_scripts': [
             'mouse = userale.examples.testapp:test_app',
             'drag = userale.examples.testdragndrop:test_drag',
             'drag2 = userale.examples.testdragndrop2:test_drag2',
             'window = userale.examples.testclose:test_close',
-            'controller = userale.examples.testwindowflags:test_controller'
+            'controller = userale.examples.testwindowflags:test_controller',
+            'usermine = userale.mining:main',
+            'userreplay = userale.replay:main',
+            'usercollect = userale.collector:main',
+            'userarchive = userale.archive:main',
+            'userlogd = userale.daemon:main'
         ]
     }
 )
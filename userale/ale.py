@@ -14,21 +14,33 @@
 # limitations under the License.
 
 from userale.version import __version__
-from userale.format import JsonFormatter
-from PyQt5.QtCore import QObject, QEvent, QTimer
-import time
-import logging
-import uuid
+from userale.clock import Clock
+from userale.buffer import ThreadBuffers, ThreadFilter, drain
+from userale.record import LogEvent
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer, QCoreApplication, \
+    pyqtSignal
+import math
+import sys
 import atexit
-import random
+from functools import partial
+from operator import attrgetter
 
-_ = JsonFormatter
+# Modules only needed once logs are written (sink, json, uuid, random)
+# or by optional subsystems are imported on first use, keeping the import
+# and construction of Ale cheap.
 
 
 class Ale (QObject):
     """
     ALE Library
     """
+
+    # Emitted by worker threads when their capture buffer was empty
+    pending = pyqtSignal()
+
+    # Log types whose handlers keep per-instance state
+    private = ('typing',)
+
     def __init__(self,
                  output="userale.log",
                  user=None,
@@ -38,7 +50,21 @@ class Ale (QObject):
                  keylog=False,
                  interval=5000,
                  resolution=100,
-                 shutoff=[]):
+                 shutoff=[],
+                 latency=False,
+                 keygap=0,
+                 deadline=2000,
+                 spill=None,
+                 context=False,
+                 heatmap=0,
+                 dwell=False,
+                 dedup=0,
+                 samplerate=1.0,
+                 config=None,
+                 crash=None,
+                 responsiveness=0,
+                 signals=False,
+                 daemon=False):
         """
         :param output: [str] The file or url path to which logs will be sent.
         :param user: [str] Identifier for the user of the application.
@@ -53,6 +79,56 @@ class Ale (QObject):
         frequency logs like mousemoves, scrolls, etc. Default is 100ms \
         (10Hz). Entering 0 disables it.
         :param shutoff: [list] Turn off logging for specific events.
+        :param latency: [bool] Add a captureLatency field holding the \
+        delay in ms between an input event and its capture.
+        :param keygap: [int] Idle time in ms that ends a typing burst. \
+        Consecutive key events on the same target are coalesced into a \
+        single typing log, whose text is only kept if keylog is enabled. \
+        Entering 0 disables it.
+        :param deadline: [int] Maximum time in ms spent writing pending \
+        logs when the application quits. Default is 2000ms.
+        :param spill: [str] Local file receiving the raw fields of the logs \
+        that could not be written within the deadline, see \
+        userale.spill.load. Defaults to output + ".spill".
+        :param context: [bool] Add a context field describing the target \
+        widget: class name, window title, text, accessible name and \
+        global geometry. Computed once per widget and cached.
+        :param heatmap: [int] Number of rows and columns of per-widget \
+        heatmaps counting clicks and mousemoves, emitted as heatmap logs \
+        with every batch. Entering 0 disables it.
+        :param dwell: [bool] Log a single dwell event with the hover \
+        duration when the pointer leaves a widget, or when the widget is \
+        hidden or destroyed. Use shutoff to drop the raw mouseenter and \
+        mouseleave logs.
+        :param dedup: [int] Window in ms within which repeated deliveries \
+        of one physical action are logged once, on the first widget \
+        receiving it. Replaces the leaf node check. Entering 0 disables \
+        it.
+        :param samplerate: [float] Fraction of sessions logged in full, \
+        decided once from a hash of the session id. Other sessions only \
+        log a summary of event counts with every batch. Every log carries \
+        the rate in its sampleRate field. Default is 1.0 (all sessions).
+        :param config: [str] JSON file overriding shutoff, keylog, \
+        resolution and interval, reloaded whenever it changes. It must \
+        hold a version, added to every log as configVersion.
+        :param crash: [str] Memory mapped file keeping the logs to be \
+        written since the last dump, once sampled, so they survive a hard \
+        crash. Logs left in it by a previous run are written at startup \
+        with a recovered field.
+        :param responsiveness: [int] Threshold in ms above which a blocked \
+        event loop is logged as a stall. Also enables responsiveness logs \
+        with every batch, holding histograms of input dispatch delays and \
+        of the time from a press to the next repaint of its window. \
+        Entering 0 disables it.
+        :param signals: [bool] Log user actions from the signals of \
+        widgets and actions as click, trigger, select, change, slide, tab \
+        and activate logs. Use shutoff to drop the low level logs they \
+        replace.
+        :param daemon: [bool] Send batches to a local writer process \
+        shared by every Ale logging to the same output, started on \
+        demand, instead of appending to it from each process. Falls back \
+        to a file per process, output + ".<pid>", when the writer is \
+        unavailable.
 
         An example log will appear like this:
 
@@ -70,7 +146,8 @@ class Ale (QObject):
                 'session': '5ee42ccc-852c-44d9-a937-28d7901e4ead',
                 'toolName': 'myApplication',
                 'toolVersion': '3.5.0',
-                'useraleVersion': '0.1.0'
+                'useraleVersion': '0.1.0',
+                'sampleRate': 1.0
             }
         """
 
@@ -78,24 +155,336 @@ class Ale (QObject):
         # UserAle Configuration
         self.output = output
         self.user = user
-        # Autogenerate session id if session is not configured
-        self.session = session if session is not None else str(uuid.uuid4())
+        # Autogenerate session id on first use if session is not configured
+        self.session = session
         self.toolname = toolname
         self.toolversion = toolversion
         self.keylog = keylog
         self.interval = interval
         self.resolution = resolution
         self.shutoff = shutoff
+        self.latency = latency
+        self.keygap = keygap
+        self.deadline = deadline
+        self.spill = spill if spill is not None else output + ".spill"
+        self.daemon = daemon
+        self.clock = Clock()
+
+        # Deterministic session sampling
+        self.samplerate = samplerate
+        self.sampled = samplerate >= 1.0 or self.__sample(samplerate)
+        self.counts = {}
+        self.countStart = None
+
+        # Optional subsystems, only run for sampled sessions
+        self.context = None
+        if context and self.sampled:
+            from userale.context import ContextCache
+            self.context = ContextCache()
+        self.heatmaps = None
+        if heatmap > 0 and self.sampled:
+            from userale.heatmap import Heatmaps
+            self.heatmaps = Heatmaps(heatmap)
+        self.dwell = None
+        if dwell and self.sampled:
+            from userale.dwell import DwellTracker
+            self.dwell = DwellTracker(self.clock,
+                                      partial(self.accept, None))
+        self.monitor = None
+        if responsiveness > 0 and self.sampled:
+            from userale.responsiveness import ResponsivenessMonitor
+            self.monitor = ResponsivenessMonitor(
+                self.clock, partial(self.accept, None), responsiveness)
+        self.signals = None
+        if signals and self.sampled:
+            from userale.signals import SignalCapture
+            self.signals = SignalCapture(self.clock,
+                                         partial(self.accept, None),
+                                         keylog=keylog, parent=self)
+            self.signals.scan()
+        self.dedup = None
+        if dedup > 0 and self.sampled:
+            from userale.dedup import Deduplicator
+            self.dedup = Deduplicator(dedup, self.clock)
+
+        # The outputs and the batch buffer are set up on the first dump
+        self.sinks = None
+        self.batch = None
+        # Sinks whose last write failed, reported once until they recover
+        self.failing = set()
+
+        # Coalesce keystrokes into typing bursts
+        self.keys = None
+
+        # Events attributed to the widget holding keyboard focus
+        self.focused = [QEvent.KeyPress, QEvent.KeyRelease, QEvent.FocusOut]
+
+        # Mapping of events to methods, and sampled events
+        self.map = self.__dispatch(self.shutoff, self.keylog)
+        self.hfreq = self.__sampled(self.map)
+        self.configVersion = None
+
+        # Single timer driving both sampling and batch transmission of
+        # logs. It is only armed while logs are pending, so an idle
+        # application is never woken up. Created on first use.
+        self.timer = None
+        self.aggregateDeadline = None
+        self.dumpDeadline = None
+
+        # Temporary storage for logs. Events are captured into per-thread
+        # buffers; sampled and coalesced logs are kept in self.logs.
+        self.logs = []
+        self.buffers = ThreadBuffers()
+        self.filters = {}
+        self.pending.connect(self.__arm, Qt.QueuedConnection)
+
+        # Register Exit hanldler. aboutToQuit runs while Qt objects are
+        # still alive; atexit catches whatever is left.
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.cleanup)
+        atexit.register(self.cleanup)
+
+        if self.monitor is not None:
+            self.monitor.start(self)
+
+        # Records surviving a hard crash
+        self.crash = None
+        if crash is not None:
+            self.__recover(crash)
+
+        # Settings reloaded while the application runs
+        self.config = None
+        if config is not None:
+            from userale.config import ConfigWatcher
+            self.config = ConfigWatcher(config, self.reconfigure, self)
+
+    def eventFilter(self, object, event):
+        '''
+        :param object: [QObject] The object being watched.
+        :param event: [QEvent] The event triggered by a user action.
+        :return: [bool] Propagate filter up if other events need to be handled
+
+        Filters events for the watched widget.
+        '''
+
+        data = None
+        t = event.type()
+
+        self.track(t, event, object)
+        route = self.route(t, event, object)
+        if route is not None:
+            name, method = route
+            data = method(name, event, object)
+
+        if data is not None:
+            self.accept(t, data)
+
+        return super(Ale, self).eventFilter(object, event)
+
+    def track(self, t, event, object):
+        '''
+        :param t: [QEvent.Type] The type of the event.
+        :param event: [QEvent] The base class for all event classes.
+        :param object: [QObject] The object being watched.
+
+        Follow state changes signalled by events, whether or not they
+        are logged.
+        '''
+
+        if self.context is not None and t in self.context.events:
+            self.context.invalidate(t, object)
+        if self.heatmaps is not None and t in self.heatmaps.events and \
+                object.isWidgetType() and len(object.children()) == 0:
+            started = self.heatmaps.add(t, event, object,
+                                        self.getClientTime())
+            if started and self.dumpDeadline is None:
+                self.dumpDeadline = self.__now() + self.interval
+                self.__schedule()
+        if self.signals is not None and t in self.signals.events:
+            self.signals.add(event, object)
+        if self.monitor is not None and t in self.monitor.events:
+            started = self.monitor.add(t, event, object)
+            if started and self.dumpDeadline is None:
+                self.dumpDeadline = self.__now() + self.interval
+                self.__schedule()
+        if self.dwell is not None:
+            if t == QEvent.Enter and object.isWidgetType() and \
+                    len(object.children()) == 0:
+                self.dwell.enter(object)
+            elif t in self.dwell.reasons and object.isWidgetType():
+                self.dwell.leave(object, self.dwell.reasons[t])
+
+    def route(self, t, event, object):
+        '''
+        :param t: [QEvent.Type] The type of the event.
+        :param event: [QEvent] The base class for all event classes.
+        :param object: [QObject] The object being watched.
+        :return: [tuple] The log type and handler for the event, or None \
+        if it is not logged.
+        '''
+
+        # Read once, the table may be swapped by reconfigure
+        map = self.map
+        if t in map:
+            # Sessions sampled out only count events
+            if not self.sampled:
+                self.__tally(t)
+                return None
+
+            # Handle focus widget
+            if t in self.focused:
+                return list(map[t].items())[0]
+
+            # Handle first receiver of a physical action
+            elif self.dedup is not None:
+                if self.dedup.first(t, event, object):
+                    return list(map[t].items())[0]
+
+            # Handle leaf node
+            elif len(object.children()) == 0:
+                # if object.isWidgetType () and len(object.children ()) == 0:
+                return list(map[t].items())[0]
+
+            # Handle window object
+            else:
+                # How to handle events on windows?
+                # It comes before the child widgets in window?
+                # Either an event actually ocurred on window or
+                # is an effect of event propagation.
+                pass
+
+        return None
+
+    def __sample(self, rate):
+        """
+        :param rate: [float] Fraction of sessions to sample.
+        :return: [bool] True if this session is logged in full.
 
-        # Configure logging
-        self.logger = logging.getLogger('userale')
-        self.logger.propagate = False
-        self.logger.setLevel(logging.INFO)
-        handler = logging.FileHandler(self.output)
-        self.logger.addHandler(handler)
+        The decision only depends on the session id, so every process
+        of a session decides alike.
+        """
+
+        import hashlib
+
+        digest = hashlib.sha1(self.session.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") < rate * 2 ** 64
+
+    def __tally(self, t):
+        """
+        :param t: [QEvent.Type] The type of an event sampled out.
+        """
+
+        if not self.counts:
+            self.countStart = self.getClientTime()
+            if self.dumpDeadline is None and \
+                    self.buffers.get().main:
+                self.dumpDeadline = self.__now() + self.interval
+                self.__schedule()
+        self.counts[t] = self.counts.get(t, 0) + 1
 
-        # Mapping of all events to methods
-        self.map = {
+    def __summary(self):
+        """
+        :return: [LogEvent] Raw record of the events counted since the \
+        last summary, or None.
+        """
+
+        counts, self.counts = self.counts, {}
+        if not counts:
+            return None
+        details = {"startTime": self.countStart,
+                   "endTime": self.getClientTime(),
+                   "counts": dict((list(self.map[t])[0], n)
+                                  for t, n in counts.items())}
+        return LogEvent(None, "summary", self.countStart, details=details)
+
+    def accept(self, t, data, release=True):
+        '''
+        :param t: [QEvent.Type] The type of the event.
+        :param data: [LogEvent] The raw record of the event.
+        :param release: [bool] Release the target of a kept record once \
+        described. Records shared by several instances are released by \
+        their owner once all of them accepted it.
+
+        Filter raw record to higher or lower priority list. Records that
+        are not sampled are kept, so their target is described now, while
+        it still exists. High frequency records keep their target until
+        one of them is chosen by :meth:`aggregate`. The full log is only
+        built when the record is dumped.
+        '''
+
+        # Records of the optional subsystems, whose types are not routed
+        if t is None and data.type in self.shutoff:
+            return
+        # The cached context is cheap, and only current at capture time
+        if self.context is not None and data.context is None and \
+                data.object is not None:
+            data.context = self.context.get(data.object)
+        buffer = self.buffers.get()
+        # data is in watched list and is a high frequency log
+        if self.resolution > 0 and t in self.hfreq:
+            buffer.hlogs.append(data)
+            if not buffer.main:
+                if len(buffer.hlogs) == 1:
+                    self.pending.emit()
+            elif self.aggregateDeadline is None:
+                self.aggregateDeadline = self.__now() + self.resolution
+                self.__schedule()
+        else:
+            if self.dedup is not None and t == QEvent.Leave:
+                self.dedup.leave(data.object, buffer.logs, data)
+            self.resolve(data, release)
+            if self.crash is not None:
+                self.crash.append(data, data.target)
+            buffer.logs.append(data)
+            if not buffer.main:
+                if len(buffer.logs) == 1:
+                    self.pending.emit()
+            elif self.dumpDeadline is None:
+                self.dumpDeadline = self.__now() + self.interval
+                self.__schedule()
+
+    @property
+    def session(self):
+        '''
+        Session id, autogenerated on first use if not configured
+        '''
+        if self.__session is None:
+            import uuid
+            self.__session = str(uuid.uuid4())
+        return self.__session
+
+    @session.setter
+    def session(self, session):
+        self.__session = session
+
+    def install(self, object):
+        '''
+        :param object: [QObject] The object to watch.
+
+        Install Ale as an event filter on an object. Objects living in
+        another thread than Ale are watched through a filter moved to
+        their thread, since Qt does not call filters across threads.
+        Install before the thread starts processing events.
+        '''
+
+        thread = object.thread()
+        if thread is self.thread():
+            object.installEventFilter(self)
+            return
+
+        if thread not in self.filters:
+            filter = ThreadFilter(self)
+            filter.moveToThread(thread)
+            self.filters[thread] = filter
+        object.installEventFilter(self.filters[thread])
+
+    def __handlers(self):
+        """
+        :return: [dict] Mapping of all events to methods.
+        """
+
+        return {
             QEvent.MouseButtonPress: {'mousedown': self.handleMouseEvents},
             QEvent.MouseButtonRelease: {'mouseup': self.handleMouseEvents},
             QEvent.MouseMove: {'mousemove': self.handleMouseEvents},
@@ -112,110 +501,452 @@ class Ale (QObject):
             QEvent.Scroll: {'scroll': self.handleScrollEvents}
         }
 
+    def __dispatch(self, shutoff, keylog):
+        """
+        :param shutoff: [list] Log types turned off.
+        :param keylog: [bool] Enable logging of keystrokes.
+        :return: [dict] Mapping of events to methods.
+
+        Build the dispatch table for a configuration. Also sets up or
+        drops the typing coalescer it relies on.
+        """
+
+        map = self.__handlers()
+
+        # Coalesce keystrokes into typing bursts
+        if self.keygap > 0 and self.sampled and 'typing' not in shutoff:
+            if self.keys is None:
+                from userale.keys import KeyCoalescer
+                self.keys = KeyCoalescer(self.keygap)
+            self.keys.keylog = keylog
+            for key in (QEvent.KeyPress, QEvent.KeyRelease, QEvent.FocusOut):
+                map[key] = {'typing': self.handleTypingEvents}
+        else:
+            self.keys = None
+
         # Turn on/off keylogging & remove specific filters
-        for key in list(self.map):
-            name = list(self.map[key])[0]
-            if (name in self.shutoff or
-                    (not self.keylog and
+        for key in list(map):
+            name = list(map[key])[0]
+            if (name in shutoff or
+                    (not keylog and
                         (name == 'keypress' or name == 'keyrelease'))):
-                del self.map[key]
-
-        # Sample rate
-        self.hfreq = [QEvent.MouseMove, QEvent.DragMove, QEvent.Scroll]
+                del map[key]
+        return map
 
-        # Sample Timer
-        if self.resolution > 0:
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.aggregate)
-            self.timer.start(self.resolution)
+    def __names(self):
+        """
+        :return: [list] Every log type this instance can write, all of \
+        which shutoff applies to.
+        """
 
-        # Batch transmission of logs
-        self.intervalID = self.startTimer(self.interval)
+        names = ['typing', 'summary']
+        names.extend(list(value)[0] for value in self.__handlers().values())
+        for subsystem in (self.heatmaps, self.dwell, self.monitor,
+                          self.signals):
+            if subsystem is not None:
+                names.extend(subsystem.types)
+        return names
 
-        # Temporary storage for logs
-        self.logs = []
-        self.hlogs = []
+    def __sampled(self, map):
+        """
+        :param map: [dict] Mapping of events to methods.
+        :return: [list] High frequency events of the mapping, sampled at \
+        self.resolution.
+        """
 
-        # Register Exit hanldler
-        atexit.register(self.cleanup)
+        return [t for t in (QEvent.MouseMove, QEvent.DragMove, QEvent.Scroll)
+                if t in map]
 
-    def eventFilter(self, object, event):
+    def reconfigure(self, config):
         '''
-        :param object: [QObject] The object being watched.
-        :param event: [QEvent] The event triggered by a user action.
-        :return: [bool] Propagate filter up if other events need to be handled
-
-        Filters events for the watched widget.
+        :param config: [dict] New values of shutoff, keylog, resolution \
+        and interval, along with the version of the config.
+
+        Apply a configuration while the application runs. Logs captured
+        under the previous configuration are written first, tagged with
+        its version, then the dispatch table is swapped at once. Raises
+        ValueError if the configuration is invalid, keeping the current
+        one.
         '''
 
-        data = None
-        t = event.type()
+        from userale.config import validate
 
-        if t in self.map:
-            # Handle leaf node
-            if len(object.children()) == 0:
-                # if object.isWidgetType () and len(object.children ()) == 0:
-                name = list(self.map[t].keys())[0]
-                method = list(self.map[t].values())[0]
-                data = method(name, event, object)
+        validate(config, self.__names())
 
-            # Handle window object
-            else:
-                # How to handle events on windows?
-                # It comes before the child widgets in window?
-                # Either an event actually ocurred on window or
-                # is an effect of event propagation.
-                pass
+        self.flushTyping()
+        if self.resolution > 0:
+            self.aggregate()
+        self.dump()
 
-        # Filter data to higher or lower priority list
-        if data is not None:
-            print (_(data))
-            # data is in watched list and is a high frequency log
-            if self.resolution > 0 and t in self.hfreq and t in self.map:
-                self.hlogs.append(data)
-            else:
-                self.logs.append(data)
+        self.shutoff = config.get('shutoff', self.shutoff)
+        self.keylog = config.get('keylog', self.keylog)
+        self.resolution = config.get('resolution', self.resolution)
+        self.interval = config.get('interval', self.interval)
+        map = self.__dispatch(self.shutoff, self.keylog)
+        self.map, self.hfreq = map, self.__sampled(map)
+        self.configVersion = config['version']
 
-        return super(Ale, self).eventFilter(object, event)
+        # Records captured by worker threads during the swap
+        self.aggregate()
+        self.__schedule()
 
     def cleanup(self):
         '''
-        Clean up any dangling logs in self.logs or self.hlogs
+        :return: [tuple] Number of logs written and spilled.
+
+        Stop the responsiveness monitor, then clean up any dangling logs
+        in self.logs or the capture buffers, spending at most
+        self.deadline ms on writing them.
         '''
+        if self.monitor is not None:
+            self.monitor.stop()
+        self.flushTyping()
+        if self.dwell is not None:
+            self.dwell.flush()
         if self.resolution > 0:
             self.aggregate()
-        self.dump()
+        written, spilled = self.dump(deadline=self.deadline)
+        if written or spilled:
+            print ("userale: wrote {} logs, spilled {} logs to {}".format(
+                written, spilled, self.spill))
+        if self.logs:
+            print ("userale: lost {} logs".format(len(self.logs)),
+                   file=sys.stderr)
+        return written, spilled
+
+    def __now(self):
+        """
+        :return: [float] Monotonic time in ms.
+        """
 
-    def timerEvent(self, event):
+        return self.clock.monotonic()
+
+    def __schedule(self):
+        """
+        Arm the timer for the earliest pending deadline, or stop it when
+        there is nothing left to aggregate or dump.
+        """
+
+        deadlines = [self.aggregateDeadline, self.dumpDeadline]
+        if self.keys is not None:
+            deadlines.append(self.keys.deadline)
+        deadlines = [d for d in deadlines if d is not None]
+        if not deadlines:
+            if self.timer is not None:
+                self.timer.stop()
+            return
+
+        if self.timer is None:
+            self.timer = QTimer(self)
+            self.timer.setSingleShot(True)
+            # Coarse timers may fire early, costing a second wakeup
+            self.timer.setTimerType(Qt.PreciseTimer)
+            self.timer.timeout.connect(self.__wakeup)
+
+        remaining = max(0, int(math.ceil(min(deadlines) - self.__now())))
+        if not self.timer.isActive() or self.timer.remainingTime() > remaining:
+            self.timer.start(remaining)
+
+    def __arm(self):
+        """
+        Set the deadlines for logs captured by worker threads.
+        """
+
+        if self.resolution > 0 and self.aggregateDeadline is None:
+            self.aggregateDeadline = self.__now() + self.resolution
+        if self.dumpDeadline is None:
+            self.dumpDeadline = self.__now() + self.interval
+        self.__schedule()
+
+    def __wakeup(self):
+        """
+        Aggregate and/or dump whichever deadlines are due, then rearm
+        the timer for the next one.
+        """
+
+        now = self.__now()
+        if self.keys is not None and self.keys.deadline is not None and \
+                now >= self.keys.deadline:
+            self.flushTyping()
+        if self.aggregateDeadline is not None and \
+                now >= self.aggregateDeadline:
+            self.aggregate()
+        if self.dumpDeadline is not None and now >= self.dumpDeadline:
+            self.dump()
+        self.__schedule()
+
+    def dump(self, deadline=None, chunk=500):
         '''
-        :param object: [list] List of events
-        :return: [void] Emit events to file
+        :param deadline: [int] Time budget in ms. Logs that could not be \
+        written in time are spilled to self.spill. By default all logs \
+        are written.
+        :param chunk: [int] Number of logs written at once when a \
+        deadline is set.
+        :return: [tuple] Number of logs written and spilled.
 
-        Routinely dump data to file or send over the network
+        Write log data to file
         '''
 
-        self.dump()
+        end = self.__now() + deadline if deadline is not None else None
+        written = spilled = 0
+        # Records accepted from here on may not be part of this dump
+        mark = self.crash.seq if self.crash is not None else None
+        records = self.logs
+        self.logs = []  # Reset logs
+        for buffer in self.buffers.all():
+            records.extend(drain(buffer.logs))
+        # Records built now, whose types are not routed
+        built = []
+        if self.heatmaps is not None:
+            built.extend(self.heatmaps.flush())
+        if self.monitor is not None:
+            built.extend(self.monitor.flush())
+        if self.counts:
+            summary = self.__summary()
+            if summary is not None:
+                built.append(summary)
+        records.extend(record for record in built
+                       if record.type not in self.shutoff)
+
+        if len(records) > 0:
+            # print ("dumping {} logs".format (len (records)))
+            # Logs of different threads are merged in time order
+            records.sort(key=attrgetter('clientTime'))
+            if end is None:
+                chunk = len(records)
+            while written < len(records):
+                if end is not None and self.__now() >= end:
+                    spilled = self.__keep(records[written:])
+                    break
+                logs = [self.__create_msg(record)
+                        for record in records[written:written + chunk]]
+                if not self.__write(logs, self.__sinks()):
+                    spilled = self.__keep(records[written:])
+                    break
+                written += len(logs)
+        if spilled is None:
+            # Kept in memory, still pending in the crash ring
+            spilled, mark = 0, None
+        if mark is not None:
+            self.crash.flushed(mark)
+        self.dumpDeadline = None
+        return written, spilled
+
+    def __keep(self, records):
+        """
+        :param records: [list] Raw records that could not be written.
+        :return: [int] Number of logs spilled, or None if they could not \
+        be spilled either and were put back in self.logs.
+        """
+
+        try:
+            spilled = self.__spill(records)
+        except (IOError, OSError) as e:
+            self.__report(self.spill, self.spill, e)
+            self.logs[:0] = records
+            return None
+        self.failing.discard(self.spill)
+        return spilled
+
+    def __report(self, key, path, error):
+        """
+        :param key: [object] What failed: a sink or a file.
+        :param path: [str] The file that could not be written.
+        :param error: [OSError] The error.
+
+        Report a failed write on standard error, the way logging reports
+        the errors of its handlers, once until it succeeds again.
+        Exceptions never reach the slots and event filters running Ale,
+        where PyQt5 aborts the application.
+        """
+
+        if key not in self.failing:
+            self.failing.add(key)
+            print ("userale: cannot write to {}: {}".format(path, error),
+                   file=sys.stderr)
+
+    def __spill(self, records):
+        """
+        :param records: [list] Raw records that missed the deadline.
+        :return: [int] Number of logs spilled.
+
+        Append the raw fields of the records to the local spill file,
+        without building or encoding their logs, so that spilling stays
+        cheap however large the backlog. ``userale.spill.load`` reads
+        them back as logs.
+        """
+
+        from userale import spill
 
-    def dump(self):
+        for record in records:
+            # Records built at dump time, such as summaries
+            if record.target is None:
+                self.resolve(record)
+        fields = {
+            "userId": self.user,
+            "session": self.session,
+            "toolName": self.toolname,
+            "toolVersion": self.toolversion,
+            "useraleVersion": __version__,
+            "sampleRate": self.samplerate
+        }
+        if self.configVersion is not None:
+            fields["configVersion"] = self.configVersion
+        header = {
+            "fields": fields,
+            "latency": bool(self.latency),
+            "context": self.context is not None
+        }
+        spill.write(self.spill, header, records)
+        return len(records)
+
+    def __recover(self, path):
+        """
+        :param path: [str] The crash file.
+
+        Write the logs a previous run accepted but never dumped, then
+        reset the file for this run.
+        """
+
+        from userale.crash import CrashRing, recover
+
+        session, records = recover(path)
+        if records:
+            logs = []
+            for record in records:
+                x, y = record['x'], record['y']
+                logs.append({
+                    "target": record['target'],
+                    "path": None,
+                    "clientTime": record['clientTime'],
+                    "location": {"x": x, "y": y} if x is not None else None,
+                    "type": record['type'],
+                    "userAction": True,   # legacy field
+                    "details": record['details'] or {},
+                    "userId": self.user,
+                    "session": session,
+                    "toolName": self.toolname,
+                    "toolVersion": self.toolversion,
+                    "useraleVersion": __version__,
+                    "recovered": True
+                })
+            if not self.__write(logs, self.__sinks()):
+                # Left for the next run
+                return
+            print ("userale: recovered {} logs from {}".format(
+                len(logs), path))
+        try:
+            self.crash = CrashRing(path, self.session)
+        except (IOError, OSError, ValueError) as e:
+            self.__report(path, path, e)
+
+    def __sinks(self):
+        """
+        :return: [list] The sinks owned by this instance: the output \
+        file, or the writer shared by the processes logging to it, and an \
+        echo on standard output.
+
+        Set up the outputs on first use.
+        """
+
+        if self.sinks is None:
+            from userale.sink import FileSink, StreamSink
+            if self.daemon:
+                from userale.daemon import DaemonSink
+                self.sinks = [DaemonSink(self.output), StreamSink()]
+            else:
+                self.sinks = [FileSink(self.output), StreamSink()]
+        return self.sinks
+
+    def __write(self, logs, sinks):
+        """
+        :param logs: [list] A batch of logs.
+        :param sinks: [list] The sinks receiving the batch, the output \
+        first.
+        :return: [bool] True if the output received the batch.
+
+        Encode the batch once and hand the same bytes to every sink. A
+        sink that fails is reported once, until it succeeds again.
+        """
+
+        if self.batch is None:
+            from userale.format import BatchBuffer
+            self.batch = BatchBuffer()
+        self.batch.add(logs)
+        written = True
+        try:
+            with self.batch.view() as view:
+                for i, sink in enumerate(sinks):
+                    try:
+                        sink.write(view)
+                    except (IOError, OSError) as e:
+                        self.__report(sink, getattr(sink, 'path', None) or
+                                      self.output, e)
+                        written = written and i > 0
+                    else:
+                        self.failing.discard(sink)
+        finally:
+            self.batch.clear()
+        return written
+
+    def flushTyping(self):
         '''
-        Write log data to file
+        End the current typing burst and queue its log
         '''
 
-        if len(self.logs) > 0:
-            # print ("dumping {} logs".format (len (self.logs)))
-            self.logger.info(_(self.logs))
-            self.logs = []  # Reset logs
+        if self.keys is not None:
+            data = self.keys.flush()
+            if data is not None:
+                self.resolve(data)
+                if self.crash is not None:
+                    self.crash.append(data, data.target)
+                self.logs.append(data)
+                if self.dumpDeadline is None:
+                    self.dumpDeadline = self.__now() + self.interval
 
     def aggregate(self):
         '''
         Sample high frequency logs at self.resolution.
-        High frequency logs are consolidated down to a single log event
-        to be emitted later
+        High frequency logs of each thread are consolidated down to a
+        single log event to be emitted later. Only the target of the
+        chosen event is described; the discarded ones are never enriched.
         '''
 
-        if len(self.hlogs) > 0:
-            self.logs.append(random.choice(self.hlogs))
-            self.hlogs = []
+        import random
+
+        for buffer in self.buffers.all():
+            hlogs = drain(buffer.hlogs)
+            if len(hlogs) > 0:
+                data = random.choice(hlogs)
+                self.resolve(data)
+                if self.crash is not None:
+                    self.crash.append(data, data.target)
+                self.logs.append(data)
+                if self.dumpDeadline is None:
+                    self.dumpDeadline = self.__now() + self.interval
+        self.aggregateDeadline = None
+
+    def resolve(self, record, release=True):
+        """
+        :param record: [LogEvent] A raw record kept for logging.
+        :param release: [bool] Release the target once described.
+
+        Describe the target of the record by its selector and path, and
+        release it. A target deleted before it was described resolves to
+        "Undefined". Records already described are left as they are.
+        """
+
+        if record.target is not None:
+            return
+        object = record.object
+        # Records built at dump time, such as heatmaps, get their context
+        if self.context is not None and record.context is None and \
+                object is not None:
+            record.context = self.context.get(object)
+        record.target = self.getSelector(object)
+        record.path = self.getPath(object)
+        if release:
+            record.object = None
 
     def getSender(self, object):
         '''
@@ -282,43 +1013,70 @@ class Ale (QObject):
         since the UNIX epoch (January 1, 1970 00:00:00 UTC)
         """
 
-        return int(time.time() * 1000)
+        return self.clock.now()
 
     def handleMouseEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a mouse event.
+        :return: [LogEvent] A raw record describing a mouse event.
 
-        Returns the userale log representing all mouse event data.
+        Returns the raw record representing all mouse event data.
         """
 
-        details = {}
-        return self.__create_msg(event_type, event, object, details=details)
+        return self.__capture(event_type, event, object)
 
     def handleKeyEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a key event.
+        :return: [LogEvent] A raw record describing a key event.
 
-        Returns the userale log representing all key events,
+        Returns the raw record representing all key events,
         including key name and key code.
         """
 
+        if not object.isWidgetType() or not object.hasFocus():
+            return None
+
         details = {"key": event.text(), "keycode": event.key()}
-        return self.__create_msg(event_type, event, object, details=details)
+        return self.__capture(event_type, event, object, details=details)
+
+    def handleTypingEvents(self, event_type, event, object):
+        """
+        :param event_type: [str] The type of event being triggered by the user.
+        :param event: [QEvent] The base class for all event classes.
+        :param object: [QObject] The base class for all Qt objects.
+        :return: [LogEvent] A raw record describing a finished typing burst.
+
+        Adds key presses to the current typing burst. The burst is
+        finished when another widget is typed in or loses focus.
+        """
+
+        t = event.type()
+        if t == QEvent.FocusOut:
+            if object is self.keys.target:
+                return self.keys.flush()
+        elif t == QEvent.KeyPress and object.isWidgetType() and \
+                object.hasFocus():
+            clientTime, latency = self.__eventTime(event)
+            data = self.keys.add(object, event, clientTime, self.__now(),
+                                 latency)
+            # A typing burst was started or extended
+            self.__schedule()
+            return data
+        return None
 
     def handleDragEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a drag event.
+        :return: [LogEvent] A raw record describing a drag event.
 
-        Returns the userale log representing all drag events.
+        Returns the raw record representing all drag events.
         """
 
         details = {}
@@ -328,31 +1086,31 @@ class Ale (QObject):
         except:
             details["source"] = None
 
-        return self.__create_msg(event_type, event, object, details=details)
+        return self.__capture(event_type, event, object, details=details)
 
     def handleMoveEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a drag event.
+        :return: [LogEvent] A raw record describing a move event.
 
-        Returns the userale log representing all move events.
+        Returns the raw record representing all move events.
         """
 
         details = {"oldPos": {"x": event.oldPos().x(),
                               "y": event.oldPos().y()}}
 
-        return self.__create_msg(event_type, event, object, details=details)
+        return self.__capture(event_type, event, object, details=details)
 
     def handleResizeEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a resize event.
+        :return: [LogEvent] A raw record describing a resize event.
 
-        Returns the userale log representing all resize events.
+        Returns the raw record representing all resize events.
         """
 
         details = {"size": {"height": event.size().height(),
@@ -360,38 +1118,88 @@ class Ale (QObject):
                    "oldSize": {"height": event.oldSize().height(),
                                "width": event.oldSize().width()}}
 
-        return self.__create_msg(event_type, event, object, details=details)
+        return self.__capture(event_type, event, object, details=details)
 
     def handleScrollEvents(self, event_type, event, object):
         """
         :param event_type: [str] The type of event being triggered by the user.
         :param event: [QEvent] The base class for all event classes.
         :param object: [QObject] The base class for all Qt objects.
-        :return: [dict] A userale log describing a scroll event.
+        :return: [LogEvent] A raw record describing a scroll event.
 
-        Returns the userale log representing all scroll events.
+        Returns the raw record representing all scroll events.
         """
 
-        return self.__create_msg(event_type, event, object)
+        return self.__capture(event_type, event, object)
 
-    def __create_msg(self, event_type, event, object, details={}):
+    def __capture(self, event_type, event, object, details=None):
+        """
+        Capture the cheap, event-bound fields of an event.
+
+        The event itself is only valid while it is being filtered, so its
+        time, position and details are copied out here. Everything derived
+        from the object (selector, path) is left to :meth:`resolve`, run
+        once the record is kept by :meth:`accept` or :meth:`aggregate`.
+        """
+
+        try:
+            pos = event.pos()
+            x, y = pos.x(), pos.y()
+        except:
+            x = y = None
+
+        clientTime, latency = self.__eventTime(event)
+        return LogEvent(object, event_type, clientTime, x, y, details,
+                        latency)
+
+    def __eventTime(self, event):
+        """
+        :return: [tuple] The time of the event and its capture latency.
+
+        Input events are timed by their own timestamp; all other events
+        by the time they are captured.
+        """
+
+        clientTime = self.getClientTime()
+        try:
+            timestamp = event.timestamp()
+        except AttributeError:
+            timestamp = 0
+        # Events synthesized by the application carry no timestamp
+        if not timestamp:
+            return clientTime, None
+        eventTime = self.clock.eventTime(timestamp, clientTime)
+        return eventTime, clientTime - eventTime
+
+    def __create_msg(self, record):
         """
-        Geneate UserAle log describing an event.
+        Geneate UserAle log describing a raw record.
         """
 
+        # Records built at dump time, such as summaries, are described now
+        if record.target is None:
+            self.resolve(record)
         data = {
-            "target": self.getSelector(object),
-            "path": self.getPath(object),
-            "clientTime": self.getClientTime(),
-            "location": self.getLocation(event),
-            "type": event_type,
+            "target": record.target,
+            "path": record.path,
+            "clientTime": record.clientTime,
+            "location": {"x": record.x, "y": record.y}
+            if record.x is not None else None,
+            "type": record.type,
             "userAction": True,   # legacy field
-            "details": details,
+            "details": record.details if record.details is not None else {},
             "userId": self.user,
             "session": self.session,
             "toolName": self.toolname,
             "toolVersion": self.toolversion,
-            "useraleVersion": __version__
+            "useraleVersion": __version__,
+            "sampleRate": self.samplerate
         }
+        if self.configVersion is not None:
+            data["configVersion"] = self.configVersion
+        if self.latency:
+            data["captureLatency"] = record.latency
+        if self.context is not None:
+            data["context"] = record.context
 
         return data
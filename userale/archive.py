@@ -0,0 +1,347 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Parallel conversion of userale log archives.
+
+Log files are split at line boundaries into ranges of bytes, which are
+parsed by a pool of processes. Gzipped files cannot be split, so each is
+streamed whole by a single task. Each range is grouped by partition, the
+day of the logs and a bucket of their session, and each group is sorted
+by session and time into a temporary run. The runs of every partition
+are then merged, in parallel too, into one gzipped NDJSON file per
+partition, or one directory of the columnar format. A ``manifest.json``
+lists the partitions with their time range and the time range and log
+count of every session they hold. Run from the command line::
+
+    userarchive --output archive --workers 8 logs/*.log
+
+Both phases only share files, so they scale with the number of
+processes until the disk is saturated. Ranges should be large enough to
+amortize starting a task, and many more than the processes to balance
+the load. The columnar format needs NumPy.
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# Compression of the temporary runs, and of the partitions
+RUN_LEVEL = 1
+PARTITION_LEVEL = 6
+
+
+def split(path, size):
+    """
+    :param path: [str] A userale log file.
+    :param size: [int] Approximate size of a range in bytes.
+    :return: [list] Ranges (path, start, end) ending at line boundaries. \
+    A gzipped file is a single range whose end is None.
+    """
+
+    if path.endswith('.gz'):
+        return [(path, 0, None)]
+    total = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < total:
+            end = start + size
+            if end < total:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            end = min(end, total)
+            ranges.append((path, start, end))
+            start = end
+    return ranges
+
+
+class Partitioner (object):
+    """
+    Name the partition of a log: the UTC day of its clientTime and a
+    bucket of its session. Days and buckets are cached, as logs of a
+    range mostly share a few of each.
+    """
+
+    def __init__(self, buckets):
+        """
+        :param buckets: [int] Number of session buckets per day.
+        """
+
+        self.buckets = buckets
+        self.days = {}
+        self.sessions = {}
+
+    def __call__(self, log):
+        """
+        :param log: [dict] A userale log.
+        :return: [str] Name of the partition holding the log.
+        """
+
+        clientTime = log.get('clientTime')
+        day = None
+        if isinstance(clientTime, (int, float)) and \
+                not isinstance(clientTime, bool):
+            day = int(clientTime // 86400000)
+        name = self.days.get(day)
+        if name is None:
+            name = 'undated'
+            if day is not None:
+                try:
+                    name = time.strftime('%Y-%m-%d',
+                                         time.gmtime(day * 86400))
+                except (OverflowError, ValueError, OSError):
+                    pass
+            self.days[day] = name
+
+        session = log.get('session')
+        bucket = self.sessions.get(session)
+        if bucket is None:
+            bucket = zlib.crc32(str(session).encode('utf-8')) % self.buckets
+            self.sessions[session] = bucket
+        return '{}-{:03d}'.format(name, bucket)
+
+
+def run_line(log):
+    """
+    :param log: [dict] A userale log.
+    :return: [bytes] The log prefixed by its session and zero padded \
+    time, so that runs are sorted and merged by comparing lines.
+    """
+
+    clientTime = log.get('clientTime')
+    if not isinstance(clientTime, (int, float)) or clientTime < 0:
+        clientTime = 0
+    return (json.dumps(str(log.get('session'))) + '\t' +
+            '{:020d}'.format(int(clientTime)) + '\t' +
+            json.dumps(log) + '\n').encode('utf-8')
+
+
+def read_range(path, start, end):
+    """
+    :param path: [str] A userale log file.
+    :param start: [int] Offset of the range.
+    :param end: [int] End of the range, or None for a whole gzipped file.
+    :return: [generator] The lines of the range.
+    """
+
+    if end is None:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                yield line
+        return
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    for line in data.split(b'\n'):
+        yield line
+
+
+def scan(task):
+    """
+    :param task: [tuple] A range, its index, the temporary directory and \
+    the number of buckets.
+    :return: [tuple] The runs written, by partition, and the number of \
+    lines that could not be parsed.
+
+    Parse a range and write one sorted run per partition.
+    """
+
+    (path, start, end), index, temp, buckets = task
+    partition = Partitioner(buckets)
+    groups = {}
+    errors = 0
+    try:
+        for line in read_range(path, start, end):
+            if not line.strip():
+                continue
+            try:
+                batch = json.loads(line.decode('utf-8'))
+            except ValueError:
+                errors += 1
+                continue
+            if not isinstance(batch, list):
+                batch = [batch]
+            for log in batch:
+                if isinstance(log, dict):
+                    groups.setdefault(partition(log), []).append(run_line(log))
+    except (EOFError, OSError, zlib.error):
+        # Truncated or corrupt gzipped file, the logs read so far are kept
+        errors += 1
+
+    runs = {}
+    for name, lines in groups.items():
+        lines.sort()
+        directory = os.path.join(temp, name)
+        os.makedirs(directory, exist_ok=True)
+        run = os.path.join(directory, '{:06d}.gz'.format(index))
+        with gzip.GzipFile(run, 'wb', RUN_LEVEL, mtime=0) as f:
+            f.write(b''.join(lines))
+        runs[name] = (run, len(lines))
+    return runs, errors
+
+
+def read_run(path):
+    """
+    :param path: [str] A run written by :func:`scan`.
+    :return: [generator] Its lines.
+    """
+
+    with gzip.open(path, 'rb') as f:
+        for line in f:
+            yield line
+
+
+def merge(task, chunk=4096):
+    """
+    :param task: [tuple] A partition, its runs, the output directory \
+    and the output format.
+    :param chunk: [int] Number of logs compressed at once.
+    :return: [dict] The manifest entry of the partition.
+
+    Merge the sorted runs of a partition into its output, then remove
+    them.
+    """
+
+    name, runs, output, format = task
+    target = os.path.join(output, name + '.ndjson.gz')
+    sessions = {}
+    entry = None
+    previous = None
+    count = 0
+    pending = []
+    # No timestamp in the header, so outputs are reproducible
+    with gzip.GzipFile(target, 'wb', PARTITION_LEVEL, mtime=0) as f:
+        for line in heapq.merge(*[read_run(run) for run in runs]):
+            session, clientTime, log = line.split(b'\t', 2)
+            clientTime = int(clientTime)
+            if session != previous:
+                previous = session
+                entry = sessions.setdefault(
+                    json.loads(session.decode('utf-8')),
+                    [clientTime, clientTime, 0])
+            entry[1] = clientTime
+            entry[2] += 1
+            pending.append(log)
+            count += 1
+            if len(pending) == chunk:
+                f.write(b''.join(pending))
+                pending = []
+        f.write(b''.join(pending))
+    for run in runs:
+        os.remove(run)
+
+    if format == 'columnar':
+        from userale.columnar import convert
+        directory = os.path.join(output, name)
+        convert(target, directory)
+        os.remove(target)
+        target = directory
+
+    times = [t for entry in sessions.values() for t in entry[:2]]
+    return {
+        'name': name,
+        'path': os.path.relpath(target, output),
+        'count': count,
+        'minTime': min(times) if times else None,
+        'maxTime': max(times) if times else None,
+        'sessions': dict((session, {'minTime': entry[0],
+                                    'maxTime': entry[1],
+                                    'count': entry[2]})
+                         for session, entry in sessions.items())
+    }
+
+
+def convert_archive(paths, output, format='ndjson', workers=None,
+                    size=64 << 20, buckets=4):
+    """
+    :param paths: [list] userale log files.
+    :param output: [str] Directory receiving the partitions and manifest.
+    :param format: [str] 'ndjson' or 'columnar'.
+    :param workers: [int] Number of processes. Defaults to the number of \
+    cores.
+    :param size: [int] Approximate size in bytes of the ranges parsed by \
+    a task.
+    :param buckets: [int] Number of session buckets per day.
+    :return: [dict] The manifest.
+    """
+
+    started = time.time()
+    temp = os.path.join(output, '.runs')
+    os.makedirs(temp, exist_ok=True)
+    ranges = [r for path in paths for r in split(path, size)]
+    tasks = [(r, index, temp, buckets) for index, r in enumerate(ranges)]
+
+    runs = {}
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for written, failed in pool.map(scan, tasks):
+            errors += failed
+            for name, (run, count) in written.items():
+                runs.setdefault(name, []).append(run)
+        # Largest partitions first, so they do not finish last
+        merges = sorted(((name, sorted(files), output, format)
+                         for name, files in runs.items()),
+                        key=lambda task: -len(task[1]))
+        partitions = list(pool.map(merge, merges))
+    shutil.rmtree(temp, ignore_errors=True)
+
+    partitions.sort(key=lambda entry: entry['name'])
+    manifest = {
+        'format': format,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'seconds': round(time.time() - started, 3),
+        'inputs': [{'path': os.path.abspath(path),
+                    'size': os.path.getsize(path)} for path in paths],
+        'count': sum(entry['count'] for entry in partitions),
+        'errors': errors,
+        'partitions': partitions
+    }
+    with open(os.path.join(output, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert userale log archives in parallel.')
+    parser.add_argument('paths', nargs='+', help='userale log files')
+    parser.add_argument('--output', required=True,
+                        help='directory receiving the partitions')
+    parser.add_argument('--format', choices=('ndjson', 'columnar'),
+                        default='ndjson',
+                        help='gzipped NDJSON or columnar (default ndjson)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of processes (default: cores)')
+    parser.add_argument('--split', type=int, default=64,
+                        help='size in MB of the ranges parsed by a task '
+                             '(default 64)')
+    parser.add_argument('--buckets', type=int, default=4,
+                        help='session buckets per day (default 4)')
+    args = parser.parse_args(argv)
+
+    manifest = convert_archive(args.paths, args.output, args.format,
+                               args.workers, args.split << 20, args.buckets)
+    print ("userarchive: {} logs in {} partitions, {} unreadable lines, "
+           "{:.1f}s".format(manifest['count'], len(manifest['partitions']),
+                            manifest['errors'], manifest['seconds']))
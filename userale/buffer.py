@@ -0,0 +1,118 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QObject
+from collections import deque
+import threading
+
+
+class Buffer (object):
+    """
+    Capture buffer of a single thread.
+
+    Only the owning thread appends to it, only the thread Ale lives in
+    pops from it. ``deque.append`` and ``deque.popleft`` are atomic, so
+    neither side needs a lock.
+    """
+
+    __slots__ = ('logs', 'hlogs', 'main')
+
+    def __init__(self, main):
+        self.logs = deque()
+        self.hlogs = deque()
+        self.main = main
+
+
+class ThreadBuffers (object):
+    """
+    Registry of per-thread capture buffers.
+    """
+
+    def __init__(self):
+        self.mainIdent = threading.get_ident()
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def get(self):
+        """
+        :return: [Buffer] The capture buffer of the calling thread.
+        """
+
+        ident = threading.get_ident()
+        try:
+            return self.buffers[ident]
+        except KeyError:
+            # Only taken once per thread
+            with self.lock:
+                buffer = Buffer(ident == self.mainIdent)
+                buffers = dict(self.buffers)
+                buffers[ident] = buffer
+                self.buffers = buffers
+            return buffer
+
+    def all(self):
+        """
+        :return: [list] The capture buffers of all threads.
+        """
+
+        return list(self.buffers.values())
+
+
+def drain(queue):
+    """
+    :param queue: [deque] A capture buffer queue.
+    :return: [list] All records taken from the queue.
+
+    Pop records until the queue is empty. A producer appending to an
+    emptied queue sees it at length one, which is how it knows to
+    notify the consumer again.
+    """
+
+    records = []
+    try:
+        while True:
+            records.append(queue.popleft())
+    except IndexError:
+        pass
+    return records
+
+
+class ThreadFilter (QObject):
+    """
+    Event filter living in a worker thread that forwards the events of
+    objects in that thread to an Ale.
+
+    Qt only calls event filters living in the same thread as the watched
+    object, so Ale cannot be installed on those objects directly.
+    """
+
+    def __init__(self, ale):
+        """
+        :param ale: [Ale] The Ale receiving the events.
+        """
+
+        QObject.__init__(self)
+        self.ale = ale
+
+    def eventFilter(self, object, event):
+        """
+        :param object: [QObject] The object being watched.
+        :param event: [QEvent] The event triggered by a user action.
+        :return: [bool] False, events are never consumed.
+        """
+
+        self.ale.eventFilter(object, event)
+        return False
@@ -0,0 +1,86 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+
+
+class Clock (object):
+    """
+    Wall clock time derived from a monotonic clock.
+
+    A single anchor pairs wall time with monotonic time, so reading the
+    clock never jumps with system time adjustments between refreshes.
+    Qt input event timestamps are mapped into the same time base through
+    an offset estimated from the smallest observed delivery delay.
+    """
+
+    def __init__(self, refresh=60000):
+        """
+        :param refresh: [int] Interval in ms after which the wall clock \
+        anchor and the event timestamp offset are refreshed.
+        """
+
+        self.refresh = refresh
+        self.offset = None
+        self.candidate = None
+        self.anchor()
+
+    def anchor(self):
+        """
+        Take a new wall clock anchor. The event timestamp offset found in
+        the last period becomes the baseline of the next one, so that
+        drift between both clocks is followed.
+        """
+
+        self.wall = time.time() * 1000
+        self.mono = self.monotonic()
+        if self.candidate is not None:
+            self.offset = self.candidate
+        self.candidate = None
+
+    def monotonic(self):
+        """
+        :return: [float] Monotonic time in ms.
+        """
+
+        return time.monotonic() * 1000
+
+    def now(self):
+        """
+        :return: [int] Milliseconds since the UNIX epoch.
+        """
+
+        mono = self.monotonic()
+        if mono - self.mono > self.refresh:
+            self.anchor()
+            mono = self.mono
+        return int(self.wall + mono - self.mono)
+
+    def eventTime(self, timestamp, now):
+        """
+        :param timestamp: [int] A QInputEvent timestamp in ms.
+        :param now: [int] The current time as returned by :meth:`now`.
+        :return: [int] Milliseconds since the UNIX epoch.
+
+        Map a Qt input event timestamp to wall time.
+        """
+
+        offset = now - timestamp
+        if self.candidate is None or offset < self.candidate:
+            self.candidate = offset
+        if self.offset is None or self.candidate < self.offset:
+            self.offset = self.candidate
+        return timestamp + self.offset
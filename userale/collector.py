@@ -0,0 +1,456 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Collector receiving userale batches over HTTP.
+
+Clients POST batches, a JSON array of logs optionally compressed with
+gzip, to ``/`` over keep-alive connections. Logs are appended to
+``<directory>/<day>/<session>.log``, one JSON array per line like the
+files written by ``Ale``, so the readers of this package work on both.
+Batches are written by group commits: requests are answered once the
+commit holding their logs is written, and all batches received while a
+commit is running go into the next one. When too many bytes wait for a
+commit, requests are refused with ``429`` and a ``Retry-After`` header.
+``GET /stats`` returns throughput counters. Run from the command line::
+
+    usercollect --port 8000 --directory logs
+
+Only the Python standard library is used.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+
+REASONS = {
+    200: b'OK',
+    204: b'No Content',
+    400: b'Bad Request',
+    404: b'Not Found',
+    405: b'Method Not Allowed',
+    411: b'Length Required',
+    413: b'Payload Too Large',
+    429: b'Too Many Requests',
+    500: b'Internal Server Error'
+}
+
+# Session ids used as file names as they are
+SAFE = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9._-]{0,127}$')
+
+
+class Rejected (Exception):
+    """
+    A request answered with an error status.
+    """
+
+    def __init__(self, status, message, headers=()):
+        """
+        :param status: [int] The HTTP status.
+        :param message: [str] Explanation sent as the body.
+        :param headers: [list] Additional (name, value) headers.
+        """
+
+        Exception.__init__(self, message)
+        self.status = status
+        self.headers = list(headers)
+
+
+def decompress(body, limit):
+    """
+    :param body: [bytes] A request body, compressed with gzip or not.
+    :param limit: [int] Largest decompressed size accepted, in bytes.
+    :return: [bytes] The decompressed body.
+    """
+
+    if body[:2] != b'\x1f\x8b':
+        return body
+    try:
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        data = inflater.decompress(body, limit)
+    except zlib.error as e:
+        raise Rejected(400, "invalid gzip body: {}".format(e))
+    if inflater.unconsumed_tail:
+        raise Rejected(413, "batch larger than {} bytes".format(limit))
+    return data
+
+
+def partition(log, today):
+    """
+    :param log: [dict] A userale log.
+    :param today: [str] The day the batch was received, as YYYY-MM-DD.
+    :return: [tuple] The day of the log and its session file name.
+    """
+
+    day = today
+    clientTime = log.get('clientTime')
+    if isinstance(clientTime, (int, float)) and \
+            not isinstance(clientTime, bool):
+        try:
+            day = time.strftime('%Y-%m-%d', time.gmtime(clientTime / 1000.0))
+        except (OverflowError, ValueError, OSError):
+            pass
+    session = log.get('session')
+    if not isinstance(session, str):
+        session = 'unknown'
+    elif not SAFE.match(session):
+        session = 'session-' + hashlib.sha1(
+            session.encode('utf-8')).hexdigest()[:16]
+    return day, session
+
+
+class Collector (object):
+    """
+    Receive batches over HTTP and append them to partitioned files.
+    """
+
+    def __init__(self,
+                 directory,
+                 commit_bytes=1 << 20,
+                 commit_interval=0,
+                 max_pending=64 << 20,
+                 max_body=16 << 20,
+                 retry_after=1):
+        """
+        :param directory: [str] Root of the partitioned log files.
+        :param commit_bytes: [int] Buffered size in bytes triggering a \
+        commit without waiting for the interval.
+        :param commit_interval: [int] Time in ms spent gathering batches \
+        before a commit. Entering 0 commits as soon as the previous \
+        commit is done; the batches received meanwhile form the next one.
+        :param max_pending: [int] Bytes waiting for a commit above which \
+        requests are refused with 429.
+        :param max_body: [int] Largest batch accepted, in bytes, once \
+        decompressed.
+        :param retry_after: [int] Seconds sent in the Retry-After header.
+        """
+
+        self.directory = directory
+        self.commit_bytes = commit_bytes
+        self.commit_interval = commit_interval
+        self.max_pending = max_pending
+        self.max_body = max_body
+        self.retry_after = retry_after
+
+        # Lines per file waiting for the next commit
+        self.buffers = {}
+        self.buffered = 0
+        # Bytes buffered or being committed
+        self.pending = 0
+        self.waiters = []
+        self.wakeup = None
+        self.full = None
+        self.committer = None
+        self.server = None
+
+        self.started = time.time()
+        self.counters = dict.fromkeys(
+            ('connections', 'requests', 'batches', 'logs', 'bytesReceived',
+             'bytesWritten', 'commits', 'rejected', 'throttled'), 0)
+        self.open = 0
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """
+        :param host: [str] Interface to listen on.
+        :param port: [int] Port to listen on.
+        :return: [Server] The listening server.
+        """
+
+        self.wakeup = asyncio.Event()
+        self.full = asyncio.Event()
+        self.committer = asyncio.ensure_future(self.commits())
+        self.server = await asyncio.start_server(self.connection,
+                                                 host, port)
+        return self.server
+
+    async def stop(self):
+        """
+        Stop listening and commit the batches still buffered.
+        """
+
+        if self.server is not None:
+            self.server.close()
+        if self.committer is not None:
+            self.committer.cancel()
+            try:
+                await self.committer
+            except asyncio.CancelledError:
+                pass
+        if self.buffers:
+            await self.commit()
+
+    async def connection(self, reader, writer):
+        """
+        Serve the requests of a keep-alive connection.
+        """
+
+        self.counters['connections'] += 1
+        self.open += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if len(request) != 3:
+                    await self.respond(writer, 400, b'bad request line',
+                                       close=True)
+                    break
+                method, target, version = request
+                close = headers.get('connection', '').lower() == 'close' or \
+                    (version == 'HTTP/1.0' and
+                     headers.get('connection', '').lower() != 'keep-alive')
+                self.counters['requests'] += 1
+                try:
+                    status, extra, body = await self.handle(
+                        method, target, headers, reader)
+                except Rejected as e:
+                    self.counters['rejected' if e.status != 429
+                                  else 'throttled'] += 1
+                    status, extra = e.status, e.headers
+                    body = str(e).encode('utf-8')
+                    # The body of a refused request may be left unread
+                    close = close or e.status in (411, 413)
+                await self.respond(writer, status, body, extra, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.open -= 1
+            writer.close()
+
+    async def handle(self, method, target, headers, reader):
+        """
+        :return: [tuple] Status, extra headers and body of the response.
+        """
+
+        path = target.split('?', 1)[0]
+        if path == '/stats':
+            if method != 'GET':
+                raise Rejected(405, "use GET")
+            return 200, [('Content-Type', 'application/json')], \
+                json.dumps(self.stats()).encode('utf-8')
+        if path != '/':
+            raise Rejected(404, "not found")
+        if method != 'POST':
+            raise Rejected(405, "use POST")
+
+        try:
+            length = int(headers['content-length'])
+        except (KeyError, ValueError):
+            raise Rejected(411, "content-length required")
+        if length > self.max_body:
+            raise Rejected(413, "batch larger than {} bytes".format(
+                self.max_body))
+        body = await reader.readexactly(length)
+        self.counters['bytesReceived'] += length
+        if self.pending >= self.max_pending:
+            raise Rejected(429, "collector busy",
+                           [('Retry-After', str(self.retry_after))])
+
+        waiter = self.ingest(decompress(body, self.max_body))
+        await waiter
+        return 204, [], b''
+
+    def ingest(self, data):
+        """
+        :param data: [bytes] A decompressed batch.
+        :return: [Future] Resolved once the batch is committed.
+
+        Validate the batch and buffer its logs by partition. Batches of a
+        single partition, the common case, are stored as received unless
+        they span several lines.
+        """
+
+        try:
+            logs = json.loads(data.decode('utf-8'))
+        except ValueError as e:
+            raise Rejected(400, "invalid JSON: {}".format(e))
+        if not isinstance(logs, list) or \
+                not all(isinstance(log, dict) for log in logs):
+            raise Rejected(400, "a batch is a JSON array of logs")
+
+        today = time.strftime('%Y-%m-%d', time.gmtime())
+        parts = {}
+        for log in logs:
+            parts.setdefault(partition(log, today), []).append(log)
+        raw = data.strip()
+        if len(parts) == 1 and b'\n' not in raw and b'\r' not in raw:
+            lines = {list(parts)[0]: raw + b'\n'}
+        else:
+            lines = dict((key, json.dumps(part).encode('utf-8') + b'\n')
+                         for key, part in parts.items())
+
+        for (day, session), line in lines.items():
+            path = os.path.join(self.directory, day, session + '.log')
+            self.buffers.setdefault(path, []).append(line)
+            self.buffered += len(line)
+            self.pending += len(line)
+        self.counters['batches'] += 1
+        self.counters['logs'] += len(logs)
+
+        waiter = asyncio.Future()
+        self.waiters.append(waiter)
+        self.wakeup.set()
+        if self.buffered >= self.commit_bytes:
+            self.full.set()
+        return waiter
+
+    async def commits(self):
+        """
+        Commit the buffered batches as soon as the previous commit is
+        done, or commit_interval ms after the first of them arrived.
+        """
+
+        while True:
+            await self.wakeup.wait()
+            if self.commit_interval > 0:
+                try:
+                    await asyncio.wait_for(self.full.wait(),
+                                           self.commit_interval / 1000.0)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                # Let the requests already read join the commit
+                await asyncio.sleep(0)
+            await self.commit()
+
+    async def commit(self):
+        """
+        Write the buffered batches, one write per file, off the event
+        loop, and answer the requests waiting for them.
+        """
+
+        buffers, waiters, size = self.buffers, self.waiters, self.buffered
+        self.buffers, self.waiters, self.buffered = {}, [], 0
+        self.wakeup.clear()
+        self.full.clear()
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(None, write, buffers)
+        except (IOError, OSError) as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(Rejected(500, str(e)))
+        else:
+            self.counters['commits'] += 1
+            self.counters['bytesWritten'] += size
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            self.pending -= size
+
+    async def respond(self, writer, status, body, headers=(), close=False):
+        """
+        Send a response with a known length.
+        """
+
+        lines = [b'HTTP/1.1 ' + str(status).encode('ascii') + b' ' +
+                 REASONS.get(status, b'')]
+        for name, value in list(headers) + [
+                ('Content-Length', str(len(body))),
+                ('Connection', 'close' if close else 'keep-alive')]:
+            lines.append(name.encode('latin-1') + b': ' +
+                         value.encode('latin-1'))
+        writer.write(b'\r\n'.join(lines) + b'\r\n\r\n' + body)
+        await writer.drain()
+
+    def stats(self):
+        """
+        :return: [dict] Counters since the collector started, and rates.
+        """
+
+        elapsed = max(time.time() - self.started, 1e-9)
+        stats = dict(self.counters)
+        stats.update({
+            'openConnections': self.open,
+            'pendingBytes': self.pending,
+            'uptime': round(elapsed, 3),
+            'logsPerSecond': round(self.counters['logs'] / elapsed, 1),
+            'batchesPerSecond': round(self.counters['batches'] / elapsed, 1),
+            'bytesPerSecond': round(self.counters['bytesReceived'] /
+                                    elapsed, 1)
+        })
+        return stats
+
+
+def write(buffers):
+    """
+    :param buffers: [dict] Lines to append, by file.
+    """
+
+    for path, lines in buffers.items():
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'ab') as f:
+            f.write(b''.join(lines))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Receive userale batches over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='interface to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000,
+                        help='port to listen on (default 8000)')
+    parser.add_argument('--directory', default='logs',
+                        help='root of the log files (default logs)')
+    parser.add_argument('--commit-bytes', type=int, default=1 << 20,
+                        help='buffered bytes triggering a commit '
+                             '(default 1 MB)')
+    parser.add_argument('--commit-interval', type=int, default=0,
+                        help='time spent gathering batches before a commit '
+                             'in ms (default 0)')
+    parser.add_argument('--max-pending', type=int, default=64 << 20,
+                        help='bytes waiting for a commit above which '
+                             'requests get 429 (default 64 MB)')
+    parser.add_argument('--max-body', type=int, default=16 << 20,
+                        help='largest decompressed batch in bytes '
+                             '(default 16 MB)')
+    args = parser.parse_args(argv)
+
+    collector = Collector(args.directory,
+                          commit_bytes=args.commit_bytes,
+                          commit_interval=args.commit_interval,
+                          max_pending=args.max_pending,
+                          max_body=args.max_body)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(collector.start(args.host, args.port))
+    print ("usercollect: listening on {}:{}, writing to {}".format(
+        args.host, args.port, os.path.abspath(args.directory)))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(collector.stop())
+        print (json.dumps(collector.stats()))
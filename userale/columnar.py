@@ -0,0 +1,272 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Columnar loading of userale logs for vectorized analysis.
+
+Log files (one JSON array of logs per line, as written by ``Ale.dump``)
+are streamed into typed column files on disk and memory-mapped back as
+NumPy arrays:
+
+* ``time``: int64 clientTime in ms, 0 when it is missing or invalid
+* ``type``, ``target``, ``session``, ``path``: int32 codes into the
+  dictionaries of the same name
+* ``x``, ``y``: int32 location, ``MISSING`` when the log has none
+
+.. code-block:: python
+
+    from userale import columnar
+
+    table = columnar.load("userale.log", cache=".userale-cache")
+    counts = columnar.counts_by_target(table)
+
+Requires NumPy.
+"""
+
+import json
+import os
+
+import numpy
+
+from userale.reader import logs, timestamp
+
+# Value of x and y for logs without a location
+MISSING = numpy.iinfo(numpy.int32).min
+
+COLUMNS = (('time', numpy.int64),
+           ('type', numpy.int32),
+           ('target', numpy.int32),
+           ('session', numpy.int32),
+           ('path', numpy.int32),
+           ('x', numpy.int32),
+           ('y', numpy.int32))
+
+CATEGORIES = ('type', 'target', 'session', 'path')
+
+
+def integer(value, dtype, default):
+    """
+    :param value: [object] A value read from a log.
+    :param dtype: [type] The integer column receiving it.
+    :param default: [int] Value written when it is missing, not a \
+    number or out of range.
+    :return: [int] The value for the column.
+    """
+
+    info = numpy.iinfo(dtype)
+    if isinstance(value, (int, float)) and info.min <= value <= info.max:
+        return int(value)
+    return default
+
+
+class Table (object):
+    """
+    Columns of a set of logs, with the dictionaries of the categorical
+    columns.
+    """
+
+    def __init__(self, columns, dictionaries):
+        """
+        :param columns: [dict] Column name to array.
+        :param dictionaries: [dict] Categorical column name to the list \
+        of values its codes refer to. Paths are joined with "/".
+        """
+
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def decode(self, name, codes=None):
+        """
+        :param name: [str] A categorical column.
+        :param codes: [array] Codes to decode, defaults to the column.
+        :return: [array] The values of the codes.
+        """
+
+        codes = self.columns[name] if codes is None else codes
+        return numpy.asarray(self.dictionaries[name], dtype=object)[codes]
+
+
+class Encoder (object):
+    """
+    Dictionary encoding of a categorical column.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __call__(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def convert(path, directory, chunk=65536):
+    """
+    :param path: [str] A userale log file.
+    :param directory: [str] Directory receiving the column files.
+    :param chunk: [int] Number of logs held in memory at once.
+
+    Stream a log file into one raw file per column, plus the
+    dictionaries in ``dictionaries.json``.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    encoders = dict((name, Encoder()) for name in CATEGORIES)
+    files = dict((name, open(os.path.join(directory, name + '.bin'), 'wb'))
+                 for name, dtype in COLUMNS)
+    rows = dict((name, []) for name, dtype in COLUMNS)
+
+    def write():
+        for name, dtype in COLUMNS:
+            numpy.asarray(rows[name], dtype=dtype).tofile(files[name])
+            rows[name] = []
+
+    try:
+        count = 0
+        for log in logs(path):
+            location = log.get('location')
+            if not isinstance(location, dict):
+                location = {}
+            x, y = location.get('x'), location.get('y')
+            logPath = log.get('path')
+            if isinstance(logPath, list):
+                logPath = '/'.join(logPath)
+            # ISO 8601 strings of older versions are converted to ms
+            rows['time'].append(integer(timestamp(log), numpy.int64, 0))
+            rows['type'].append(encoders['type'](log.get('type')))
+            rows['target'].append(encoders['target'](log.get('target')))
+            rows['session'].append(encoders['session'](log.get('session')))
+            rows['path'].append(encoders['path'](logPath))
+            rows['x'].append(integer(x, numpy.int32, MISSING))
+            rows['y'].append(integer(y, numpy.int32, MISSING))
+            count += 1
+            if count % chunk == 0:
+                write()
+        write()
+    finally:
+        for f in files.values():
+            f.close()
+
+    with open(os.path.join(directory, 'dictionaries.json'), 'w') as f:
+        json.dump(dict((name, encoders[name].values)
+                       for name in CATEGORIES), f)
+
+
+def open_table(directory):
+    """
+    :param directory: [str] Directory written by :func:`convert`.
+    :return: [Table] The columns, memory-mapped.
+    """
+
+    columns = {}
+    for name, dtype in COLUMNS:
+        filename = os.path.join(directory, name + '.bin')
+        if os.path.getsize(filename) == 0:
+            columns[name] = numpy.zeros(0, dtype=dtype)
+        else:
+            columns[name] = numpy.memmap(filename, dtype=dtype, mode='r')
+    with open(os.path.join(directory, 'dictionaries.json')) as f:
+        dictionaries = json.load(f)
+    return Table(columns, dictionaries)
+
+
+def load(path, cache=None, chunk=65536):
+    """
+    :param path: [str] A userale log file.
+    :param cache: [str] Directory caching converted files. Files are \
+    converted again when their size or modification time changes. \
+    Defaults to a directory next to the log file.
+    :param chunk: [int] Number of logs held in memory while converting.
+    :return: [Table] The columns of the logs, memory-mapped.
+    """
+
+    stat = os.stat(path)
+    if cache is None:
+        cache = os.path.join(os.path.dirname(os.path.abspath(path)),
+                             '.userale-cache')
+    directory = os.path.join(cache, '{}-{}-{}'.format(
+        os.path.basename(path), stat.st_size, int(stat.st_mtime * 1e9)))
+    if not os.path.exists(os.path.join(directory, 'dictionaries.json')):
+        convert(path, directory, chunk=chunk)
+    return open_table(directory)
+
+
+def concat(tables):
+    """
+    :param tables: [list] Tables, e.g. one per log file.
+    :return: [Table] A single table with merged dictionaries.
+    """
+
+    columns = dict((name, []) for name, dtype in COLUMNS)
+    encoders = dict((name, Encoder()) for name in CATEGORIES)
+    for table in tables:
+        for name, dtype in COLUMNS:
+            column = table.columns[name]
+            if name in encoders:
+                remap = numpy.array(
+                    [encoders[name](value)
+                     for value in table.dictionaries[name]], dtype=dtype)
+                column = remap[column] if len(remap) else column
+            columns[name].append(column)
+    return Table(dict((name, numpy.concatenate(columns[name]).astype(dtype))
+                      for name, dtype in COLUMNS),
+                 dict((name, encoders[name].values) for name in CATEGORIES))
+
+
+def events_per_second(table):
+    """
+    :param table: [Table] Columns of the logs.
+    :return: [tuple] Arrays of seconds since the UNIX epoch and the \
+    number of logs in each, for the seconds holding any log.
+    """
+
+    seconds, counts = numpy.unique(table['time'] // 1000,
+                                   return_counts=True)
+    return seconds, counts
+
+
+def counts_by_target(table):
+    """
+    :param table: [Table] Columns of the logs.
+    :return: [dict] Number of logs per target.
+    """
+
+    counts = numpy.bincount(table['target'],
+                            minlength=len(table.dictionaries['target']))
+    return dict(zip(table.dictionaries['target'], counts.tolist()))
+
+
+def inter_event_gaps(table):
+    """
+    :param table: [Table] Columns of the logs.
+    :return: [array] Time in ms between consecutive logs of the same \
+    session, in session and time order.
+    """
+
+    order = numpy.lexsort((table['time'], table['session']))
+    time = numpy.asarray(table['time'])[order]
+    session = numpy.asarray(table['session'])[order]
+    same = session[1:] == session[:-1]
+    return numpy.diff(time)[same]
@@ -0,0 +1,109 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import json
+from PyQt5.QtCore import QObject, QFileSystemWatcher
+
+
+# Settings that can be changed while the application runs, and a check
+# of their values
+FIELDS = {
+    'version': lambda value: isinstance(value, (str, int)) and
+    not isinstance(value, bool),
+    'shutoff': lambda value: isinstance(value, list) and
+    all(isinstance(name, str) for name in value),
+    'keylog': lambda value: isinstance(value, bool),
+    'resolution': lambda value: isinstance(value, int) and
+    not isinstance(value, bool) and value >= 0,
+    'interval': lambda value: isinstance(value, int) and
+    not isinstance(value, bool) and value > 0
+}
+
+
+def validate(config, names):
+    """
+    :param config: [dict] The settings to apply.
+    :param names: [list] The log types known to shutoff.
+    :return: [dict] The settings, once checked.
+
+    Raise a ValueError describing the first invalid setting. A config
+    must carry a version, which is added to every log written under it.
+    """
+
+    if not isinstance(config, dict):
+        raise ValueError("config must be an object")
+    if 'version' not in config:
+        raise ValueError("missing version")
+    for key, value in config.items():
+        if key not in FIELDS:
+            raise ValueError("unknown setting {}".format(key))
+        if not FIELDS[key](value):
+            raise ValueError("invalid {}: {!r}".format(key, value))
+    for name in config.get('shutoff', []):
+        if name not in names:
+            raise ValueError("unknown log type {}".format(name))
+    return config
+
+
+class ConfigWatcher (QObject):
+    """
+    Watch a JSON config file and pass its content on whenever it changes.
+
+    Editors often save by writing a new file and renaming it over the
+    old one, which drops the file from the watcher. The directory is
+    watched as well, so the file is watched again once replaced.
+    """
+
+    def __init__(self, path, apply, parent=None):
+        """
+        :param path: [str] The config file.
+        :param apply: [callable] Receives the parsed config, and raises \
+        ValueError if it is rejected.
+        :param parent: [QObject] Owner of the watcher.
+        """
+
+        QObject.__init__(self, parent)
+        self.path = os.path.abspath(path)
+        self.apply = apply
+        self.content = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(self.path))
+        self.watcher.fileChanged.connect(self.check)
+        self.watcher.directoryChanged.connect(self.check)
+        self.check()
+
+    def check(self, *args):
+        """
+        Reload the file if its content changed. A rejected config is
+        reported and the current one is kept.
+        """
+
+        if os.path.exists(self.path) and \
+                self.path not in self.watcher.files():
+            self.watcher.addPath(self.path)
+        try:
+            with open(self.path, "rb") as f:
+                content = f.read()
+        except (IOError, OSError):
+            return
+        if content == self.content:
+            return
+        self.content = content
+        try:
+            self.apply(json.loads(content.decode("utf-8")))
+        except ValueError as e:
+            print ("userale: ignoring config {}: {}".format(self.path, e))
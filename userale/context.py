@@ -0,0 +1,130 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPoint
+from PyQt5.QtWidgets import QAbstractButton, QLabel
+from functools import partial
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+
+class ContextCache (object):
+    """
+    Cache of the fields describing each widget.
+
+    Fields are computed the first time a widget is described and kept
+    until an event shows they may have changed:
+
+    * ``Move`` and ``Resize`` of any widget invalidate all geometries,
+      since moving a widget moves its descendants too.
+    * ``WindowTitleChange`` invalidates all window titles.
+    * ``Paint`` of a widget invalidates its text and accessible name. A
+      change of text only becomes visible to the user through a repaint.
+
+    Entries are keyed by the address of the Qt object and dropped when
+    it is destroyed.
+    """
+
+    # Events invalidating a group of cached fields
+    events = {
+        QEvent.Move: 'geometry',
+        QEvent.Resize: 'geometry',
+        QEvent.WindowTitleChange: 'windowTitle',
+        QEvent.Paint: 'text'
+    }
+
+    def __init__(self):
+        self.entries = {}
+        self.generation = {'geometry': 0, 'windowTitle': 0}
+
+    def invalidate(self, t, object):
+        """
+        :param t: [QEvent.Type] One of the types in self.events.
+        :param object: [QObject] The object receiving the event.
+        """
+
+        group = self.events[t]
+        if group == 'text':
+            try:
+                entry = self.entries.get(sip.unwrapinstance(object))
+            except (TypeError, RuntimeError):
+                return
+            if entry is not None:
+                entry.pop('text', None)
+        else:
+            self.generation[group] += 1
+
+    def get(self, object):
+        """
+        :param object: [QObject] The object to describe, or None.
+        :return: [dict] The context of the object, or None if there is \
+        none or it has been deleted.
+        """
+
+        if object is None:
+            return None
+        try:
+            key = sip.unwrapinstance(object)
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {
+                    'className': object.metaObject().className()
+                }
+                object.destroyed.connect(partial(self.entries.pop, key, None))
+            if not object.isWidgetType():
+                return {'className': entry['className']}
+
+            if 'text' not in entry:
+                text = None
+                if isinstance(object, (QAbstractButton, QLabel)):
+                    text = object.text()
+                entry['text'] = (text, object.accessibleName())
+            for group in self.generation:
+                cached = entry.get(group)
+                if cached is None or cached[0] != self.generation[group]:
+                    entry[group] = (self.generation[group],
+                                    getattr(self, group)(object))
+        except (TypeError, RuntimeError):
+            return None
+
+        return {
+            'className': entry['className'],
+            'windowTitle': entry['windowTitle'][1],
+            'text': entry['text'][0],
+            'accessibleName': entry['text'][1],
+            'geometry': entry['geometry'][1]
+        }
+
+    def windowTitle(self, object):
+        """
+        :param object: [QWidget] The widget.
+        :return: [str] Title of the window containing the widget.
+        """
+
+        return object.window().windowTitle()
+
+    def geometry(self, object):
+        """
+        :param object: [QWidget] The widget.
+        :return: [dict] Position in global coordinates and size.
+        """
+
+        pos = object.mapToGlobal(QPoint(0, 0))
+        return {'x': pos.x(), 'y': pos.y(),
+                'width': object.width(), 'height': object.height()}
@@ -0,0 +1,169 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import mmap
+import struct
+import threading
+import zlib
+
+# File header: magic, version, slot size, slot count, last flushed
+# sequence number and session of the writer
+HEADER = struct.Struct('<4sHHIQ44s')
+MAGIC = b'UALR'
+VERSION = 1
+FLUSHED = struct.calcsize('<4sHHI')
+
+# Slot header: sequence number, checksum of the payload seeded with the
+# sequence number, payload length
+SLOT = struct.Struct('<QIH')
+
+# Payload: clientTime, x, y, then the lengths of the type and target,
+# followed by both and the JSON encoded details
+FIELDS = struct.Struct('<qiiBB')
+NONE = -2 ** 31
+
+
+class CrashRing (object):
+    """
+    Fixed-size ring of the records kept for logging since the last dump,
+    kept in a memory mapped file. High frequency records only enter it
+    once sampled, so bursts of them do not evict the actions before a
+    crash.
+
+    Writes land in the page cache, so they survive the process dying
+    without running any exit handler, although not a crash of the
+    system. Every record takes one slot holding its sequence number and
+    a checksum; a slot that was being written when the process died
+    fails its checksum and is ignored. Details that do not fit in a slot
+    are dropped.
+    """
+
+    def __init__(self, path, session, slots=4096, size=256):
+        """
+        :param path: [str] The ring file, created or reset.
+        :param session: [str] Session id of the records.
+        :param slots: [int] Number of records kept.
+        :param size: [int] Size of a slot in bytes.
+        """
+
+        self.path = path
+        self.slots = slots
+        self.size = size
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.names = {}
+        length = HEADER.size + slots * size
+        self.file = open(path, 'w+b')
+        self.file.truncate(length)
+        self.map = mmap.mmap(self.file.fileno(), length)
+        HEADER.pack_into(self.map, 0, MAGIC, VERSION, size, slots, 0,
+                         session.encode('utf-8')[:44])
+
+    def append(self, record, target):
+        """
+        :param record: [LogEvent] A record kept for logging.
+        :param target: [str] The selector of its target.
+        """
+
+        type = self.names.get(record.type)
+        if type is None:
+            type = self.names[record.type] = \
+                record.type.encode('utf-8')[:255]
+        target = target.encode('utf-8')[:255]
+        payload = FIELDS.pack(record.clientTime or 0,
+                              NONE if record.x is None else record.x,
+                              NONE if record.y is None else record.y,
+                              len(type), len(target)) + type + target
+        if record.details:
+            details = json.dumps(record.details).encode('utf-8')
+            if len(payload) + len(details) <= self.size - SLOT.size:
+                payload += details
+        payload = payload[:self.size - SLOT.size]
+
+        with self.lock:
+            self.seq = seq = self.seq + 1
+            offset = HEADER.size + (seq % self.slots) * self.size
+            slot = SLOT.pack(seq, zlib.crc32(payload, seq & 0xffffffff),
+                             len(payload)) + payload
+            self.map[offset:offset + len(slot)] = slot
+
+    def flushed(self, seq):
+        """
+        :param seq: [int] Sequence number of the last record written to \
+        the output.
+        """
+
+        struct.pack_into('<Q', self.map, FLUSHED, seq)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def recover(path):
+    """
+    :param path: [str] A ring file left by a previous run.
+    :return: [tuple] The session of the records, and the records that \
+    were never flushed, as dicts ordered by sequence number.
+    """
+
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except (IOError, OSError):
+        return None, []
+    if len(data) < HEADER.size:
+        return None, []
+    magic, version, size, slots, flushed, session = \
+        HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or \
+            len(data) < HEADER.size + slots * size:
+        return None, []
+
+    records = []
+    for slot in range(slots):
+        offset = HEADER.size + slot * size
+        seq, crc, length = SLOT.unpack_from(data, offset)
+        if seq <= flushed or length < FIELDS.size or \
+                length > size - SLOT.size:
+            continue
+        payload = data[offset + SLOT.size:offset + SLOT.size + length]
+        if zlib.crc32(payload, seq & 0xffffffff) != crc:
+            continue
+        clientTime, x, y, typeLength, targetLength = \
+            FIELDS.unpack_from(payload, 0)
+        start = FIELDS.size
+        type = payload[start:start + typeLength]
+        start += typeLength
+        target = payload[start:start + targetLength]
+        start += targetLength
+        try:
+            details = json.loads(payload[start:].decode('utf-8')) \
+                if start < length else None
+        except ValueError:
+            details = None
+        records.append({
+            'seq': seq,
+            'type': type.decode('utf-8', 'replace'),
+            'target': target.decode('utf-8', 'replace'),
+            'clientTime': clientTime,
+            'x': None if x == NONE else x,
+            'y': None if y == NONE else y,
+            'details': details
+        })
+    records.sort(key=lambda record: record['seq'])
+    return session.rstrip(b'\0').decode('utf-8', 'replace'), records
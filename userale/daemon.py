@@ -0,0 +1,377 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Local fan-in of the logs of several processes sharing one output.
+
+Every Ale of an application made of several processes would append to
+the same file, interleaving and contending on it. With the daemon
+option, they send their encoded batches over a Unix domain socket to a
+single writer process instead, which is started by the first of them
+and exits once the last one is gone. The writer appends whole batches,
+in the order each process sent them, gathering whatever arrived at once
+into a single write.
+
+Batches are framed by their length, so a batch cut short by a process
+dying is dropped rather than written truncated. When the writer cannot
+be reached or started, or on a platform without Unix domain sockets,
+every process appends to its own file, output + ".<pid>", and tries the
+writer again later. The writer can also be run by hand::
+
+    userlogd userale.log
+"""
+
+import argparse
+import errno
+import hashlib
+import os
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from userale.sink import FileSink
+
+# Length of the batches that follow
+FRAME = struct.Struct('<I')
+
+
+def default_address(output):
+    """
+    :param output: [str] The file to which logs are appended.
+    :return: [str] The socket of the writer of that file, in the \
+    temporary directory, since socket paths are short.
+    """
+
+    digest = hashlib.sha1(os.path.abspath(output).encode('utf-8'))
+    return os.path.join(tempfile.gettempdir(),
+                        'userale-{}.sock'.format(digest.hexdigest()[:16]))
+
+
+class DaemonSink (object):
+    """
+    Sink sending batches to the writer of the output, started on demand.
+
+    The connection is made on the first write. Batches that cannot be
+    sent go to the fallback file, output + ".<pid>", and the writer is
+    tried again after retry seconds.
+    """
+
+    def __init__(self, output, address=None, timeout=2.0, retry=5.0):
+        """
+        :param output: [str] The file to which the writer appends logs.
+        :param address: [str] Socket of the writer. Defaults to one \
+        derived from output.
+        :param timeout: [float] Seconds spent starting the writer, and \
+        at most blocked sending a batch.
+        :param retry: [float] Seconds after a failure before the writer \
+        is tried again.
+        """
+
+        self.output = output
+        self.address = address if address is not None \
+            else default_address(output)
+        self.timeout = timeout
+        self.retry = retry
+        self.socket = None
+        self.fallback = None
+        self.retryAt = None
+
+    def write(self, data):
+        """
+        :param data: [memoryview] Encoded batches, each ending with a \
+        newline.
+        """
+
+        if self.socket is None and (self.retryAt is None or
+                                    time.monotonic() >= self.retryAt):
+            self.socket = self.__connect()
+            self.retryAt = None if self.socket is not None \
+                else time.monotonic() + self.retry
+        if self.socket is not None:
+            try:
+                self.socket.sendall(FRAME.pack(len(data)))
+                self.socket.sendall(data)
+                return
+            except OSError:
+                # The writer drops the partial batch once disconnected
+                self.socket.close()
+                self.socket = None
+                self.retryAt = time.monotonic() + self.retry
+        if self.fallback is None:
+            self.fallback = FileSink('{}.{}'.format(self.output,
+                                                    os.getpid()))
+        self.fallback.write(data)
+
+    def close(self):
+        """
+        Disconnect from the writer and close the fallback file.
+        """
+
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        if self.fallback is not None:
+            self.fallback.close()
+
+    def __connect(self):
+        """
+        :return: [socket] Connection to the writer, started if needed, \
+        or None.
+        """
+
+        if not hasattr(socket, 'AF_UNIX'):
+            return None
+        connection = self.__attempt()
+        if connection is not None:
+            return connection
+        try:
+            launcher = subprocess.Popen(
+                [sys.executable, '-c',
+                 'import sys; from userale.daemon import main; '
+                 'main(sys.argv[1:])',
+                 '--detach', '--address', self.address, self.output],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, close_fds=True)
+            launcher.wait(self.timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        limit = time.monotonic() + self.timeout
+        while time.monotonic() < limit:
+            connection = self.__attempt()
+            if connection is not None:
+                return connection
+            time.sleep(0.01)
+        return None
+
+    def __attempt(self):
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.address)
+        except OSError:
+            connection.close()
+            return None
+        connection.settimeout(self.timeout)
+        return connection
+
+
+class LogDaemon (object):
+    """
+    Single writer appending the batches of every connected process to
+    one output.
+
+    Only one writer runs per socket: it holds a lock next to the socket
+    for its lifetime. It exits when no process has been connected for
+    linger seconds.
+    """
+
+    def __init__(self, output, address=None, linger=5.0):
+        """
+        :param output: [str] The file to which logs are appended.
+        :param address: [str] Socket to listen on. Defaults to one \
+        derived from output.
+        :param linger: [float] Seconds without any connection before \
+        the writer exits.
+        """
+
+        self.output = output
+        self.address = address if address is not None \
+            else default_address(output)
+        self.linger = linger
+        self.lock = None
+        self.listener = None
+        self.file = None
+        self.selector = None
+        self.pending = {}
+
+    def bind(self, wait=1.0):
+        """
+        :param wait: [float] Seconds spent waiting for a writer that is \
+        exiting to release the socket.
+        :return: [bool] Whether this process is the writer. False as well \
+        when the output cannot be opened.
+        """
+
+        import fcntl
+        try:
+            self.lock = open(self.address + '.lock', 'a')
+        except OSError:
+            return False
+        limit = time.monotonic() + wait
+        while True:
+            try:
+                fcntl.flock(self.lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EACCES) or \
+                        time.monotonic() >= limit:
+                    self.lock.close()
+                    self.lock = None
+                    return False
+                time.sleep(0.01)
+
+        # Before listening, so no process sends batches that cannot be
+        # written
+        try:
+            self.file = open(self.output, 'ab')
+        except OSError:
+            self.lock.close()
+            self.lock = None
+            return False
+
+        # Left behind by a writer that was killed
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.address)
+        self.listener.listen(128)
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        return True
+
+    def serve(self):
+        """
+        Write batches until no process has been connected for linger
+        seconds.
+        """
+
+        idle = time.monotonic()
+        while True:
+            timeout = None
+            if not self.pending:
+                timeout = idle + self.linger - time.monotonic()
+                if timeout <= 0:
+                    break
+            ready = self.selector.select(timeout)
+            frames = []
+            for key, _ in ready:
+                if key.fileobj is self.listener:
+                    self.__accept()
+                else:
+                    self.__receive(key.fileobj, frames)
+            if frames:
+                self.file.write(b''.join(frames))
+                self.file.flush()
+            if ready and not self.pending:
+                idle = time.monotonic()
+
+    def close(self):
+        """
+        Remove the socket, write what processes connecting meanwhile
+        already sent, then release the lock for the next writer. Their
+        next batch fails and goes to their fallback until they start a
+        new writer.
+        """
+
+        if self.listener is not None:
+            os.unlink(self.address)
+            self.__accept()
+            frames = []
+            limit = time.monotonic() + 0.1
+            while self.pending and time.monotonic() < limit:
+                for key, _ in self.selector.select(0.01):
+                    if key.fileobj is not self.listener:
+                        self.__receive(key.fileobj, frames)
+            self.file.write(b''.join(frames))
+            self.selector.close()
+            self.listener.close()
+            self.file.close()
+            self.listener = None
+        for connection in list(self.pending):
+            connection.close()
+        self.pending.clear()
+        if self.lock is not None:
+            self.lock.close()
+            self.lock = None
+
+    def __accept(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            connection.setblocking(False)
+            self.selector.register(connection, selectors.EVENT_READ)
+            self.pending[connection] = bytearray()
+
+    def __receive(self, connection, frames):
+        """
+        :param connection: [socket] A readable connection.
+        :param frames: [list] Complete batches received so far this round.
+        """
+
+        buffer = self.pending[connection]
+        try:
+            data = connection.recv(1 << 20)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            # A batch cut short is dropped with the connection
+            self.selector.unregister(connection)
+            connection.close()
+            del self.pending[connection]
+            return
+        if buffer:
+            data = bytes(buffer) + data
+            del buffer[:]
+        # Batches are written from the received bytes without a copy
+        view = memoryview(data)
+        start = 0
+        while len(data) - start >= FRAME.size:
+            size, = FRAME.unpack_from(data, start)
+            if len(data) - start - FRAME.size < size:
+                break
+            start += FRAME.size
+            frames.append(view[start:start + size])
+            start += size
+        buffer += view[start:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Append the userale batches of local processes to one '
+                    'file.')
+    parser.add_argument('output', help='file to which logs are appended')
+    parser.add_argument('--address',
+                        help='socket to listen on (default derived from '
+                             'the output)')
+    parser.add_argument('--linger', type=float, default=5.0,
+                        help='seconds without any connection before '
+                             'exiting (default 5)')
+    parser.add_argument('--detach', action='store_true',
+                        help='run in the background')
+    args = parser.parse_args(argv)
+
+    if args.detach:
+        # The parent returns at once, so its launcher does not wait
+        if os.fork() > 0:
+            os._exit(0)
+        os.setsid()
+    daemon = LogDaemon(args.output, args.address, args.linger)
+    if not daemon.bind():
+        return
+    try:
+        daemon.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
@@ -0,0 +1,166 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent
+from PyQt5.QtWidgets import QApplication
+from collections import OrderedDict
+import threading
+
+
+class Deduplicator (object):
+    """
+    Attribute each physical action to exactly one target.
+
+    An application-wide filter sees an input event once per receiver:
+    on the window forwarding it, on the widget under the pointer, and on
+    every parent it propagates to while it is ignored. All deliveries of
+    an action share its type, native timestamp and global position, so
+    only the first widget receiving it within a short window is kept.
+
+    Enter and Leave are sent to every widget on the way in or out; only
+    the widget under the pointer is kept. A Leave followed within the
+    window by an Enter on the same widget, as when it is reparented or
+    re-shown, is synthetic and both logs are dropped.
+
+    Events carrying neither a timestamp nor a position, such as resizes,
+    are only delivered to their receiver and are never dropped. Worker
+    threads share the instance, so its state is guarded by a lock.
+    """
+
+    def __init__(self, window, clock):
+        """
+        :param window: [int] Time in ms during which an action is \
+        remembered.
+        :param clock: [Clock] The clock timing the window.
+        """
+
+        self.window = window
+        self.clock = clock
+        self.seen = OrderedDict()
+        self.hovered = None
+        self.left = None
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def first(self, t, event, object):
+        """
+        :param t: [QEvent.Type] The type of the event.
+        :param event: [QEvent] The event.
+        :param object: [QObject] The object receiving the event.
+        :return: [bool] True if this is the delivery to log.
+        """
+
+        # Windows only forward events to their widget
+        if object.isWindowType():
+            return False
+
+        key = None
+        if t not in (QEvent.Enter, QEvent.Leave):
+            key = self.key(t, event, object)
+            if key is None:
+                return True
+        now = self.clock.monotonic()
+        with self.lock:
+            if t == QEvent.Enter:
+                first = self.enter(event, object, now)
+            elif t == QEvent.Leave:
+                first = self.hovered is object
+                if first:
+                    self.hovered = None
+            else:
+                first = self.remember(key, now)
+            if not first:
+                self.dropped += 1
+        return first
+
+    def remember(self, key, now):
+        """
+        :param key: [tuple] Key of an action.
+        :param now: [float] Monotonic time in ms.
+        :return: [bool] True if the action was not seen in the window.
+        """
+
+        while self.seen:
+            oldest = next(iter(self.seen.values()))
+            if now - oldest <= self.window:
+                break
+            self.seen.popitem(last=False)
+        if key in self.seen:
+            return False
+        self.seen[key] = now
+        return True
+
+    def key(self, t, event, object):
+        """
+        :return: [tuple] Type, native timestamp and global position of \
+        the action, or None when the event has neither.
+        """
+
+        try:
+            timestamp = event.timestamp()
+        except AttributeError:
+            timestamp = 0
+        try:
+            pos = event.globalPos()
+        except AttributeError:
+            try:
+                pos = object.mapToGlobal(event.pos())
+            except (AttributeError, TypeError):
+                pos = None
+        if not timestamp and pos is None:
+            return None
+        if pos is not None:
+            pos = (pos.x(), pos.y())
+        return (t, timestamp, pos)
+
+    def enter(self, event, object, now):
+        """
+        :return: [bool] True if the pointer entered the widget under it.
+        """
+
+        try:
+            pos = event.globalPos()
+        except AttributeError:
+            # Sent by the application without a position, as by the
+            # replay tool: only its receiver sees it
+            pos = None
+        if pos is not None and QApplication.widgetAt(pos) is not object:
+            return False
+        self.hovered = object
+        if self.left is not None:
+            left, time, queue, record = self.left
+            self.left = None
+            if left is object and now - time <= self.window:
+                # Synthetic pair, take back the Leave if still queued
+                try:
+                    queue.remove(record)
+                except ValueError:
+                    pass
+                return False
+        return True
+
+    def leave(self, object, queue, record):
+        """
+        :param object: [QWidget] The widget left.
+        :param queue: [deque] The queue holding the Leave log.
+        :param record: [LogEvent] The raw record of the Leave log.
+
+        Remember a logged Leave, in case it is followed by a synthetic
+        Enter.
+        """
+
+        with self.lock:
+            self.left = (object, self.clock.monotonic(), queue, record)
@@ -0,0 +1,117 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent
+from functools import partial
+from userale.record import LogEvent
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+
+class DwellTracker (object):
+    """
+    Pair Enter events with the end of the hover to compute dwell times.
+
+    The hover of a widget ends when the pointer leaves it, or when the
+    widget is hidden or destroyed while the pointer is over it. Only the
+    widgets currently hovered are kept.
+    """
+
+    # Log types written
+    types = ('dwell',)
+
+    # Events ending a hover, and the reason logged for them
+    reasons = {
+        QEvent.Leave: 'leave',
+        QEvent.Hide: 'hide'
+    }
+
+    def __init__(self, clock, emit):
+        """
+        :param clock: [Clock] The clock timing the hovers.
+        :param emit: [callable] Receives the raw record of each dwell.
+        """
+
+        self.clock = clock
+        self.emit = emit
+        self.entered = {}
+
+    def enter(self, object):
+        """
+        :param object: [QWidget] The widget being entered.
+        """
+
+        key = sip.unwrapinstance(object)
+        if key in self.entered:
+            return
+        slot = partial(self.destroyed, key)
+        object.destroyed.connect(slot)
+        self.entered[key] = (object, self.clock.now(),
+                             self.clock.monotonic(), slot)
+
+    def leave(self, object, reason):
+        """
+        :param object: [QWidget] The widget being left.
+        :param reason: [str] Why the hover ended.
+        """
+
+        try:
+            key = sip.unwrapinstance(object)
+        except (TypeError, RuntimeError):
+            return
+        entry = self.entered.pop(key, None)
+        if entry is not None:
+            object.destroyed.disconnect(entry[3])
+            self.end(entry, reason)
+
+    def destroyed(self, key, *args):
+        """
+        :param key: [int] Address of the destroyed widget.
+        """
+
+        entry = self.entered.pop(key, None)
+        if entry is not None:
+            self.end(entry, 'destroyed')
+
+    def end(self, entry, reason):
+        """
+        :param entry: [tuple] The hover being ended.
+        :param reason: [str] Why the hover ended.
+        """
+
+        object, enterTime, start, slot = entry
+        duration = int(self.clock.monotonic() - start)
+        details = {"enterTime": enterTime,
+                   "leaveTime": enterTime + duration,
+                   "duration": duration,
+                   "reason": reason}
+        self.emit(LogEvent(object, "dwell", enterTime, details=details))
+
+    def flush(self):
+        """
+        End all hovers, as if the pointer left every widget.
+        """
+
+        for key in list(self.entered):
+            entry = self.entered.pop(key)
+            try:
+                entry[0].destroyed.disconnect(entry[3])
+            except (TypeError, RuntimeError):
+                pass
+            self.end(entry, 'flush')
@@ -0,0 +1,165 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Fan-in benchmark for Apache UserALE.PyQt5.
+
+Producer processes write the same batches either each to the shared
+output, as every Ale does by default, or through the local writer of
+the daemon option. Reports the aggregate throughput for 1 to 32
+producers and checks that every batch arrives whole. Exits with a
+non-zero status when a batch is lost or cut. Run with::
+
+    python -m userale.examples.benchdaemon
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from userale.daemon import DaemonSink
+from userale.format import BatchBuffer
+from userale.sink import FileSink
+
+PRODUCERS = (1, 2, 4, 8, 16, 32)
+BATCHES = 100
+LOGS = 50
+
+
+def encoded_batch(producer, count):
+    """
+    :return: [bytes] One encoded batch of count logs.
+    """
+
+    buffer = BatchBuffer()
+    buffer.add([{
+        "target": "testLineEdit",
+        "path": ["Example", "testFrame", "testLineEdit"],
+        "clientTime": 1700000000000 + i,
+        "location": {"x": i % 300, "y": i % 200},
+        "type": "mousemove",
+        "userAction": True,
+        "details": {"producer": producer},
+        "userId": "userABC1234",
+        "session": "session-{}".format(producer),
+        "toolName": "myApplication",
+        "toolVersion": "3.5.0",
+        "useraleVersion": "0.1.0",
+        "sampleRate": 1.0
+    } for i in range(count)])
+    with buffer.view() as view:
+        return bytes(view)
+
+
+def produce(sink, producer, start):
+    data = encoded_batch(producer, LOGS)
+    start.wait()
+    for _ in range(BATCHES):
+        sink.write(memoryview(data))
+    sink.close()
+
+
+def shared_producer(output, producer, start):
+    produce(FileSink(output), producer, start)
+
+
+def daemon_producer(output, producer, start):
+    produce(DaemonSink(output), producer, start)
+
+
+def run(target, output, producers):
+    """
+    :return: [float] Seconds from the start of the producers until \
+    every batch is in the output.
+    """
+
+    start = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=target,
+                                         args=(output, i, start))
+                 for i in range(producers)]
+    for process in processes:
+        process.start()
+    expected = sum(len(encoded_batch(i, LOGS))
+                   for i in range(producers)) * BATCHES
+    began = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+    while os.path.getsize(output) < expected:
+        time.sleep(0.001)
+    return time.perf_counter() - began
+
+
+def check_output(output, producers):
+    """
+    :return: [list] Descriptions of the batches lost, cut or reordered.
+    """
+
+    counts = {}
+    errors = []
+    with open(output, "rb") as f:
+        for number, line in enumerate(f):
+            try:
+                logs = json.loads(line.decode("utf-8"))
+            except ValueError:
+                errors.append("line {} is not a whole batch".format(number))
+                continue
+            producer = logs[0]["details"]["producer"]
+            counts[producer] = counts.get(producer, 0) + 1
+    if counts != dict((i, BATCHES) for i in range(producers)):
+        errors.append("batches per producer {}".format(counts))
+    return errors
+
+
+def bench_daemon():
+    directory = tempfile.mkdtemp()
+    errors = []
+
+    for producers in PRODUCERS:
+        shared = os.path.join(directory, "shared-{}.log".format(producers))
+        open(shared, "wb").close()
+        before = run(shared_producer, shared, producers)
+        errors += check_output(shared, producers)
+
+        fanin = os.path.join(directory, "daemon-{}.log".format(producers))
+        open(fanin, "wb").close()
+        # Start the writer beforehand, timed separately
+        began = time.perf_counter()
+        DaemonSink(fanin).write(memoryview(b""))
+        startup = time.perf_counter() - began
+        after = run(daemon_producer, fanin, producers)
+        errors += check_output(fanin, producers)
+
+        logs = producers * BATCHES * LOGS
+        print ("{:2d} producer(s): shared file {:8.0f} logs/s, daemon "
+               "{:8.0f} logs/s (writer started in {:.0f} ms)".format(
+                   producers, logs / before, logs / after, startup * 1e3))
+
+    for error in errors:
+        print ("error: {}".format(error))
+    print ("checks: {}".format("ok" if not errors else "FAILED"))
+    shutil.rmtree(directory, ignore_errors=True)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    bench_daemon()
@@ -0,0 +1,119 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Encoding benchmark for Apache UserALE.PyQt5.
+
+Compares encoding every batch once for all sinks with the former path,
+which encoded each log again for the echo and the batch again for every
+output. The framing itself is checked by the test suite. Run with::
+
+    python -m userale.examples.benchencode
+"""
+
+import os
+import time
+
+from userale.format import BatchBuffer, JsonFormatter
+
+LOGS = 20000
+CHUNK = 500
+
+
+def sample_logs(count):
+    """
+    :param count: [int] Number of logs.
+    :return: [list] Logs shaped like the output of Ale, including text \
+    that needs escaping.
+    """
+
+    return [{
+        "target": "testLineEdit",
+        "path": ["Example", "testFrame", "testLineEdit"],
+        "clientTime": 1700000000000 + i,
+        "location": {"x": i % 300, "y": i % 200},
+        "type": "mousemove",
+        "userAction": True,
+        "details": {"text": "line\nbreak \"quoted\" café ✓"}
+        if i % 10 == 0 else {},
+        "userId": "userABC1234",
+        "session": "5ee42ccc-852c-44d9-a937-28d7901e4ead",
+        "toolName": "myApplication",
+        "toolVersion": "3.5.0",
+        "useraleVersion": "0.1.0",
+        "sampleRate": 1.0
+    } for i in range(count)]
+
+
+def batches(logs, chunk):
+    return [logs[i:i + chunk] for i in range(0, len(logs), chunk)]
+
+
+def former(parts, files):
+    """
+    Encode each log for the echo, and each batch for every output.
+    """
+
+    for part in parts:
+        for log in part:
+            str(JsonFormatter(log))
+        for f in files:
+            f.write("%s\n" % JsonFormatter(part))
+
+
+def encode_once(parts, files):
+    """
+    Encode each batch once and hand the same bytes to every output.
+    """
+
+    buffer = BatchBuffer()
+    for part in parts:
+        buffer.add(part)
+        with buffer.view() as view:
+            for f in files:
+                f.write(view)
+        buffer.clear()
+
+
+def measure(function, parts, sinks, mode, runs=5):
+    """
+    :return: [float] Best time per log in microseconds.
+    """
+
+    best = None
+    for _ in range(runs):
+        files = [open(os.devnull, mode) for _ in range(sinks)]
+        start = time.perf_counter()
+        function(parts, files)
+        elapsed = time.perf_counter() - start
+        for f in files:
+            f.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1e6 / sum(len(part) for part in parts)
+
+
+def bench_encode():
+    parts = batches(sample_logs(LOGS), CHUNK)
+    for sinks in (1, 2, 4):
+        before = measure(former, parts, sinks, "w")
+        after = measure(encode_once, parts, sinks, "wb")
+        print ("{} sink(s): former {:.2f} us/log, encode once {:.2f} "
+               "us/log ({:.1f}x)".format(sinks, before, after,
+                                          before / after))
+
+
+if __name__ == "__main__":
+    bench_encode()
@@ -22,3 +22,43 @@ class JsonFormatter (object):
 
     def __str__(self):
         return "%s" % (json.dumps(self.data, sort_keys=False))
+
+
+class BatchBuffer (object):
+    """
+    Growable buffer of encoded batches, framed as one JSON array per
+    line.
+
+    Logs are encoded once, when their batch is added. Sinks are handed a
+    memoryview of the buffer, so any number of them write the same bytes
+    without encoding or copying them again.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.batches = 0
+
+    def add(self, logs):
+        """
+        :param logs: [list] A batch of logs.
+        """
+
+        self.data += json.dumps(logs, sort_keys=False).encode("utf-8")
+        self.data += b"\n"
+        self.batches += 1
+
+    def view(self):
+        """
+        :return: [memoryview] The batches added since the last clear. \
+        Release it before adding to or clearing the buffer.
+        """
+
+        return memoryview(self.data)
+
+    def clear(self):
+        """
+        Drop the batches, keeping the buffer for the next ones.
+        """
+
+        del self.data[:]
+        self.batches = 0
@@ -0,0 +1,133 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent
+from userale.record import LogEvent
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+
+class Heatmap (object):
+    """
+    Click and move counts of a single widget on a fixed grid.
+    """
+
+    def __init__(self, object, size, startTime):
+        self.object = object
+        self.startTime = startTime
+        self.endTime = startTime
+        if numpy is not None:
+            self.clicks = numpy.zeros(size * size, dtype=numpy.uint32)
+            self.moves = numpy.zeros(size * size, dtype=numpy.uint32)
+        else:
+            self.clicks = [0] * (size * size)
+            self.moves = [0] * (size * size)
+
+
+class Heatmaps (object):
+    """
+    Per-widget 2D histograms of mouse positions.
+
+    Positions are normalized to the size of the widget, so a histogram
+    takes ``size * size`` cells no matter how many events it counts or
+    how the widget is resized. NumPy arrays are used when available.
+    """
+
+    # Log types written
+    types = ('heatmap',)
+
+    # Events accumulated, and the histogram counting them
+    events = {
+        QEvent.MouseButtonPress: 'clicks',
+        QEvent.MouseMove: 'moves'
+    }
+
+    def __init__(self, size):
+        """
+        :param size: [int] Number of rows and columns of the grid.
+        """
+
+        self.size = size
+        self.maps = {}
+
+    def add(self, t, event, object, clientTime):
+        """
+        :param t: [QEvent.Type] One of the types in self.events.
+        :param event: [QMouseEvent] The mouse event.
+        :param object: [QWidget] The widget receiving the event.
+        :param clientTime: [int] Time of the event.
+        :return: [bool] True if this started a new histogram.
+        """
+
+        width, height = object.width(), object.height()
+        if width <= 0 or height <= 0:
+            return False
+        pos = event.pos()
+        column = min(self.size - 1, max(0, pos.x() * self.size // width))
+        row = min(self.size - 1, max(0, pos.y() * self.size // height))
+
+        key = sip.unwrapinstance(object)
+        heatmap = self.maps.get(key)
+        started = heatmap is None
+        if started:
+            heatmap = self.maps[key] = Heatmap(object, self.size, clientTime)
+        getattr(heatmap, self.events[t])[row * self.size + column] += 1
+        heatmap.endTime = clientTime
+        return started
+
+    def flush(self):
+        """
+        :return: [list] Raw records of all histograms, which are reset.
+        """
+
+        records = []
+        for heatmap in self.maps.values():
+            details = {"grid": [self.size, self.size],
+                       "startTime": heatmap.startTime,
+                       "endTime": heatmap.endTime,
+                       "clicks": self.encode(heatmap.clicks),
+                       "moves": self.encode(heatmap.moves)}
+            records.append(LogEvent(heatmap.object, "heatmap",
+                                    heatmap.startTime, details=details))
+        self.maps = {}
+        return records
+
+    def encode(self, counts):
+        """
+        :param counts: [list] Row-major cell counts.
+        :return: [object] The counts as a list, or as a dict of the \
+        non-zero cells and their counts if that is smaller.
+        """
+
+        if numpy is not None:
+            index = numpy.flatnonzero(counts)
+            if 2 * len(index) < len(counts):
+                return {"index": index.tolist(),
+                        "count": counts[index].tolist()}
+            return counts.tolist()
+
+        index = [i for i, n in enumerate(counts) if n]
+        if 2 * len(index) < len(counts):
+            return {"index": index, "count": [counts[i] for i in index]}
+        return counts
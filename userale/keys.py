@@ -0,0 +1,105 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtGui import QKeySequence
+from userale.record import LogEvent
+
+
+class KeyCoalescer (object):
+    """
+    Merge consecutive key presses on the same target into typing bursts.
+
+    A burst ends when the target changes, when no key has been pressed
+    for ``gap`` ms, or when it holds ``limit`` keys, so memory stays
+    bounded no matter how long the user types.
+    """
+
+    def __init__(self, gap, keylog=False, limit=256):
+        """
+        :param gap: [int] Idle time in ms that ends a burst.
+        :param keylog: [bool] Keep the typed text. Otherwise only the \
+        key count and special keys are recorded.
+        :param limit: [int] Maximum number of keys in a single burst.
+        """
+
+        self.gap = gap
+        self.keylog = keylog
+        self.limit = limit
+        self.target = None
+        self.deadline = None
+
+    def add(self, object, event, clientTime, now, latency=None):
+        """
+        :param object: [QObject] The widget receiving the key press.
+        :param event: [QKeyEvent] The key press.
+        :param clientTime: [int] Time of the key press.
+        :param now: [float] Monotonic time in ms.
+        :param latency: [int] Capture latency of the key press in ms. A \
+        burst carries the latency of its first key, which times it.
+        :return: [LogEvent] The raw record of a burst that ended, or None.
+
+        Add a key press to the current burst.
+        """
+
+        done = None
+        if self.target is not None and \
+                (object is not self.target or self.count >= self.limit):
+            done = self.flush()
+
+        if self.target is None:
+            self.target = object
+            self.startTime = clientTime
+            self.latency = latency
+            self.count = 0
+            self.text = []
+            self.special = []
+
+        self.endTime = clientTime
+        self.count += 1
+        text = event.text()
+        if text and text.isprintable():
+            if self.keylog:
+                self.text.append(text)
+        else:
+            self.special.append(QKeySequence(event.key()).toString())
+        self.deadline = now + self.gap
+
+        return done
+
+    def flush(self):
+        """
+        :return: [LogEvent] The raw record of the current burst, or None.
+
+        End the current burst.
+        """
+
+        if self.target is None:
+            return None
+
+        details = {"startTime": self.startTime,
+                   "endTime": self.endTime,
+                   "count": self.count,
+                   "special": self.special}
+        if self.keylog:
+            details["text"] = "".join(self.text)
+        record = LogEvent(self.target, "typing", self.startTime,
+                          details=details, latency=self.latency)
+
+        self.target = None
+        self.deadline = None
+        self.text = self.special = None
+
+        return record
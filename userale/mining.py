@@ -0,0 +1,217 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Streaming interaction sequence mining.
+
+Counts the most frequent n-grams of ``(type, target)`` states within
+each session, and the most frequent transitions between consecutive
+states, over log archives of any size. Counting uses the Space-Saving
+algorithm, which keeps at most ``capacity`` counters: every reported
+count overestimates the true count by at most its reported error, and
+any item occurring more than ``total / capacity`` times is guaranteed
+to be reported. The windows of at most ``sessions`` sessions are kept;
+the least recently seen session is evicted first.
+
+Run from the command line::
+
+    usermine --n 3 --top 20 userale.log archive/*.log
+"""
+
+import argparse
+import heapq
+import json
+from collections import OrderedDict
+
+from userale.reader import logs
+
+
+class SpaceSaving (object):
+    """
+    Approximate heavy hitter counting in bounded memory.
+    """
+
+    def __init__(self, capacity):
+        """
+        :param capacity: [int] Maximum number of counters kept.
+        """
+
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        # Lazy min-heap holding one (count, order, item) entry per counted
+        # item. Counts are not updated in place; an entry whose count is
+        # stale is pushed back with the current count when popped.
+        self.heap = []
+        self.order = 0
+
+    def add(self, item):
+        """
+        :param item: [object] A hashable item to count.
+        """
+
+        self.total += 1
+        if item in self.counts:
+            self.counts[item] += 1
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[item] = 1
+            self.errors[item] = 0
+            self.push(1, item)
+            return
+
+        # Replace the item with the smallest count
+        while True:
+            count, order, smallest = heapq.heappop(self.heap)
+            if self.counts[smallest] == count:
+                break
+            self.push(self.counts[smallest], smallest)
+        del self.counts[smallest]
+        del self.errors[smallest]
+        self.counts[item] = count + 1
+        self.errors[item] = count
+        self.push(count + 1, item)
+
+    def push(self, count, item):
+        # The order breaks ties, so items never need to be comparable
+        self.order += 1
+        heapq.heappush(self.heap, (count, self.order, item))
+
+    def top(self, k):
+        """
+        :param k: [int] Number of items to report.
+        :return: [list] Tuples of item, count and error bound, by \
+        decreasing count. The true count lies in [count - error, count].
+        """
+
+        items = heapq.nlargest(k, self.counts.items(), key=lambda i: i[1])
+        return [(item, count, self.errors[item]) for item, count in items]
+
+    def guaranteed(self, k):
+        """
+        :param k: [int] Number of items reported by :meth:`top`.
+        :return: [bool] True if the reported top k are exactly the true \
+        top k.
+        """
+
+        items = heapq.nlargest(k + 1, self.counts.items(),
+                               key=lambda i: i[1])
+        if len(items) <= k:
+            return True
+        kth = items[k - 1] if k > 0 else None
+        return kth is None or kth[1] - self.errors[kth[0]] >= items[k][1]
+
+
+class SequenceMiner (object):
+    """
+    Count n-grams and transitions of (type, target) states per session.
+    """
+
+    def __init__(self, n=2, capacity=10000, sessions=10000):
+        """
+        :param n: [int] Length of the counted n-grams.
+        :param capacity: [int] Counters kept for n-grams and transitions.
+        :param sessions: [int] Sessions whose last states are kept. A \
+        session seen again after being evicted starts a new window.
+        """
+
+        self.n = n
+        self.ngrams = SpaceSaving(capacity)
+        self.transitions = SpaceSaving(capacity)
+        self.sessions = sessions
+        # Last states of each session, least recently seen first
+        self.windows = OrderedDict()
+        self.skipped = 0
+
+    def add(self, log):
+        """
+        :param log: [dict] A userale log. Logs of a session are expected \
+        in time order.
+        """
+
+        state = (log.get('type'), log.get('target'))
+        session = log.get('session')
+        window = self.windows.get(session)
+        if window is None:
+            window = self.windows[session] = []
+            if len(self.windows) > self.sessions:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(session)
+        if window:
+            self.transitions.add((window[-1], state))
+        window.append(state)
+        if len(window) > self.n:
+            del window[0]
+        if len(window) == self.n:
+            self.ngrams.add(tuple(window))
+
+    def add_all(self, paths):
+        """
+        :param paths: [list] userale log files. Lines that cannot be \
+        parsed are skipped and counted in self.skipped.
+        """
+
+        for path in paths:
+            skipped = []
+            for log in logs(path, skipped):
+                self.add(log)
+            self.skipped += len(skipped)
+
+
+def report(miner, k):
+    """
+    :param miner: [SequenceMiner] A miner that has seen the logs.
+    :param k: [int] Number of n-grams and transitions reported.
+    :return: [dict] The top n-grams and transitions with error bounds.
+    """
+
+    def entries(counter, key):
+        return [{key: [list(state) for state in item], 'count': count,
+                 'error': error} for item, count, error in counter.top(k)]
+
+    return {
+        'n': miner.n,
+        'skipped': miner.skipped,
+        'total': {'ngrams': miner.ngrams.total,
+                  'transitions': miner.transitions.total},
+        'exact': {'ngrams': miner.ngrams.guaranteed(k),
+                  'transitions': miner.transitions.guaranteed(k)},
+        'ngrams': entries(miner.ngrams, 'ngram'),
+        'transitions': entries(miner.transitions, 'transition')
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Mine frequent interaction sequences from userale logs.')
+    parser.add_argument('paths', nargs='+', help='userale log files')
+    parser.add_argument('--n', type=int, default=2,
+                        help='length of the n-grams (default 2)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='number of results reported (default 10)')
+    parser.add_argument('--capacity', type=int, default=10000,
+                        help='counters kept in memory (default 10000)')
+    parser.add_argument('--sessions', type=int, default=10000,
+                        help='sessions tracked at once (default 10000)')
+    args = parser.parse_args(argv)
+
+    miner = SequenceMiner(n=args.n, capacity=args.capacity,
+                          sessions=args.sessions)
+    miner.add_all(args.paths)
+    print (json.dumps(report(miner, args.top), indent=2))
@@ -0,0 +1,82 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import json
+from datetime import datetime
+
+
+def batches(path, skipped=None):
+    """
+    :param path: [str] A userale log file.
+    :param skipped: [list] Receives the number of every line that could \
+    not be parsed.
+    :return: [generator] The batches in the file, each a list of logs.
+
+    Log files hold one JSON array of logs per line, as written by
+    ``Ale.dump``, or one log per line, as written by ``userarchive``.
+    Files ending with ``.gz`` are decompressed. Lines that cannot be
+    parsed, such as the last line of a file whose writer was killed, are
+    skipped.
+    """
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', errors='replace') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                if skipped is not None:
+                    skipped.append(number)
+                continue
+            yield batch if isinstance(batch, list) else [batch]
+
+
+def logs(path, skipped=None):
+    """
+    :param path: [str] A userale log file.
+    :param skipped: [list] Receives the number of every line that could \
+    not be parsed.
+    :return: [generator] The logs in the file.
+    """
+
+    for batch in batches(path, skipped):
+        for log in batch:
+            if isinstance(log, dict):
+                yield log
+
+
+def timestamp(log):
+    """
+    :param log: [dict] A userale log.
+    :return: [float] Its clientTime in ms, or None.
+
+    Accepts the milliseconds written by current versions as well as the
+    ISO 8601 strings of older ones.
+    """
+
+    value = log.get('clientTime')
+    if isinstance(value, (int, float)):
+        return float(value)
+    for pattern in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S.%f'):
+        try:
+            return datetime.strptime(value, pattern).timestamp() * 1000.0
+        except (TypeError, ValueError):
+            pass
+    return None
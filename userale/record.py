@@ -0,0 +1,56 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+class LogEvent (object):
+    """
+    Raw record of a captured event, kept until it is dumped.
+
+    Only the fields bound to the event are stored. Session constants are
+    held once by the Ale, and the public dict shape of the log is derived
+    when it is encoded. The selector and path of the target are resolved
+    once the record is kept for logging, which releases the target.
+    """
+
+    __slots__ = ('object', 'type', 'clientTime', 'x', 'y', 'details',
+                 'latency', 'context', 'target', 'path')
+
+    def __init__(self, object, type, clientTime, x=None, y=None,
+                 details=None, latency=None, target=None, path=None):
+        """
+        :param object: [QObject] The target of the event, or None.
+        :param type: [str] The log type.
+        :param clientTime: [int] Milliseconds since the UNIX epoch.
+        :param x: [int] Position of the event within the target, or None.
+        :param y: [int] Position of the event within the target, or None.
+        :param details: [dict] Type specific fields, or None.
+        :param latency: [int] Capture latency in ms, or None.
+        :param target: [str] Selector of the target, or None until it is \
+        resolved.
+        :param path: [list] Path of the target, or None until it is \
+        resolved.
+        """
+
+        self.object = object
+        self.type = type
+        self.clientTime = clientTime
+        self.x = x
+        self.y = y
+        self.details = details
+        self.latency = latency
+        self.target = target
+        self.path = path
+        # Description of the target when the event was captured
+        self.context = None
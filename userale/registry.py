@@ -0,0 +1,89 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QObject
+
+
+class AleRegistry (QObject):
+    """
+    Event filter fanning out events to several Ale instances.
+
+    Each instance keeps its own configuration, buffers and output; the
+    registry only makes sure that an event accepted by several of them
+    is captured once. Install the registry instead of the instances:
+
+    .. code-block:: python
+
+        registry = AleRegistry([Ale(output="all.log"),
+                                Ale(output="clicks.log",
+                                    shutoff=["mousemove"])])
+        app.installEventFilter(registry)
+    """
+
+    def __init__(self, instances=()):
+        """
+        :param instances: [list] The Ale instances to register.
+        """
+
+        QObject.__init__(self)
+        self.instances = list(instances)
+
+    def register(self, ale):
+        """
+        :param ale: [Ale] An instance to receive events.
+        """
+
+        if ale not in self.instances:
+            self.instances.append(ale)
+
+    def unregister(self, ale):
+        """
+        :param ale: [Ale] An instance to stop receiving events.
+        """
+
+        if ale in self.instances:
+            self.instances.remove(ale)
+
+    def eventFilter(self, object, event):
+        """
+        :param object: [QObject] The object being watched.
+        :param event: [QEvent] The event triggered by a user action.
+        :return: [bool] False, events are never consumed.
+        """
+
+        t = event.type()
+        records = {}
+        for ale in self.instances:
+            ale.track(t, event, object)
+            route = ale.route(t, event, object)
+            if route is None:
+                continue
+            name, method = route
+            # Handlers keeping per-instance state are never shared
+            if name in ale.private:
+                key = (name, ale)
+            else:
+                key = (name, method.__func__)
+            if key not in records:
+                records[key] = method(name, event, object)
+            if records[key] is not None:
+                # The target is needed by every instance accepting it
+                ale.accept(t, records[key], release=False)
+        for record in records.values():
+            # Sampled records keep their target until aggregated
+            if record is not None and record.target is not None:
+                record.object = None
+        return False
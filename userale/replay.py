@@ -0,0 +1,408 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Replay-driven load generator.
+
+Rebuilds an offscreen widget tree from the ``path`` fields of a recorded
+userale log and sends its events again through ``QApplication.sendEvent``
+to an ``Ale`` installed on the application, at a multiple of the
+recorded speed or as fast as possible. Reports the latency of the event
+filter, records accepted but never written, memory growth and sink
+throughput, as JSON::
+
+    userreplay --speed 10 --repeat 5 userale.log
+
+Events that cannot be rebuilt from a log (typing bursts, dwells,
+heatmaps, summaries, drag moves and drops) are skipped and counted.
+Windows receiving key events are shown, so that their targets can take
+the focus. ``Ale`` prints every log it writes; this output is discarded
+while replaying. An existing output is never overwritten.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from PyQt5.QtCore import QEvent, QMimeData, QObject, QPointF, QSize, Qt
+from PyQt5.QtGui import QDragEnterEvent, QDragLeaveEvent, QKeyEvent, \
+    QMouseEvent, QMoveEvent, QResizeEvent, QScrollEvent
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from userale.ale import Ale
+from userale.reader import logs, timestamp
+
+# Log types sampled at resolution, whose accepted records are expected
+# to be written only in part
+SAMPLED = ('mousemove', 'dragmove', 'scroll')
+
+# Log types sent to the focus widget
+KEYS = ('keypress', 'keyrelease')
+
+
+def position(log):
+    """
+    :param log: [dict] A userale log.
+    :return: [QPointF] The recorded position, or the origin.
+    """
+
+    location = log.get('location') or {}
+    return QPointF(location.get('x') or 0, location.get('y') or 0)
+
+
+def mouse(t, button, buttons):
+    def make(widget, log):
+        return QMouseEvent(t, position(log), button, buttons, Qt.NoModifier)
+    return make
+
+
+def key(t):
+    def make(widget, log):
+        # Ale only logs the key events of the focus widget
+        if not widget.hasFocus():
+            QApplication.setActiveWindow(widget.window())
+            widget.setFocus(Qt.OtherFocusReason)
+        return QKeyEvent(t, Qt.Key_A, Qt.NoModifier, "a")
+    return make
+
+
+def dragenter(widget, log):
+    return QDragEnterEvent(position(log).toPoint(), Qt.CopyAction, MIME,
+                           Qt.LeftButton, Qt.NoModifier)
+
+
+MIME = QMimeData()
+
+# Builders of the event behind each log type. Qt only delivers drag
+# moves and drops during an actual drag, so they are skipped.
+EVENTS = {
+    'mousedown': mouse(QEvent.MouseButtonPress, Qt.LeftButton,
+                       Qt.LeftButton),
+    'mouseup': mouse(QEvent.MouseButtonRelease, Qt.LeftButton,
+                     Qt.NoButton),
+    'mousemove': mouse(QEvent.MouseMove, Qt.NoButton, Qt.NoButton),
+    'mouseenter': lambda widget, log: QEvent(QEvent.Enter),
+    'mouseleave': lambda widget, log: QEvent(QEvent.Leave),
+    'keypress': key(QEvent.KeyPress),
+    'keyrelease': key(QEvent.KeyRelease),
+    'dragenter': dragenter,
+    'dragleave': lambda widget, log: QDragLeaveEvent(),
+    'move': lambda widget, log: QMoveEvent(widget.pos(), widget.pos()),
+    'resize': lambda widget, log: QResizeEvent(widget.size(),
+                                               QSize(-1, -1)),
+    'scroll': lambda widget, log: QScrollEvent(
+        QPointF(), QPointF(), QScrollEvent.ScrollUpdated)
+}
+
+
+class WidgetTree (object):
+    """
+    Offscreen widgets named after the selectors of recorded paths.
+
+    Every path prefix gets a widget, so widgets that were parents in the
+    recording are parents again and the leaf node check of ``Ale``
+    treats them alike.
+    """
+
+    def __init__(self):
+        self.widgets = {}
+
+    def get(self, path):
+        """
+        :param path: [list] Selectors from the top level widget down.
+        :return: [QWidget] The widget at the end of the path, or None.
+        """
+
+        if not isinstance(path, list) or not path:
+            return None
+        path = tuple(path)
+        widget = self.widgets.get(path)
+        if widget is None:
+            parent = self.get(list(path[:-1])) if len(path) > 1 else None
+            widget = QWidget(parent)
+            widget.setObjectName(str(path[-1]))
+            widget.resize(100, 100)
+            widget.setAcceptDrops(True)
+            self.widgets[path] = widget
+        return widget
+
+
+def schedule(path, tree, repeat=1):
+    """
+    :param path: [str] A userale log file.
+    :param tree: [WidgetTree] Receives the recorded widgets.
+    :param repeat: [int] Number of times the recording is played.
+    :return: [tuple] The events to send, as (offset in ms, widget, \
+    builder, log) sorted by offset, and the counts of skipped logs.
+    """
+
+    events = []
+    skipped = {}
+    for log in logs(path):
+        make = EVENTS.get(log.get('type'))
+        widget = tree.get(log.get('path')) if make is not None else None
+        if widget is None:
+            skipped[log.get('type')] = skipped.get(log.get('type'), 0) + 1
+            continue
+        if log.get('type') in KEYS:
+            # Hidden widgets cannot take the focus
+            widget.window().show()
+        events.append((timestamp(log), widget, make, log))
+
+    times = [event[0] for event in events if event[0] is not None]
+    first = min(times) if times else 0.0
+    length = (max(times) - first if times else 0.0) + 1.0
+    events = [(t - first if t is not None else 0.0, widget, make, log)
+              for t, widget, make, log in events]
+    events.sort(key=lambda event: event[0])
+    played = []
+    for i in range(repeat):
+        played.extend((offset + i * length, widget, make, log)
+                      for offset, widget, make, log in events)
+    return played, skipped
+
+
+def resident():
+    """
+    :return: [float] Resident memory of the process in MB, or None.
+    """
+
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / 2.0 ** 20, 2)
+    except (IOError, OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current size, in KB on Linux
+        return round(resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss / 1024.0, 2)
+    except ImportError:
+        return None
+
+
+def percentiles(values, points=(50, 90, 99, 99.9)):
+    """
+    :param values: [list] Durations in seconds.
+    :param points: [tuple] Percentiles to report.
+    :return: [dict] The percentiles and maximum, in microseconds.
+    """
+
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {}
+    for point in points:
+        index = min(len(values) - 1, int(len(values) * point / 100.0))
+        result['p{:g}'.format(point)] = round(values[index] * 1e6, 2)
+    result['max'] = round(values[-1] * 1e6, 2)
+    return result
+
+
+class Probe (QObject):
+    """
+    Event filter timing the filter of an Ale, and counting the records
+    it accepts and the logs it writes.
+    """
+
+    def __init__(self, ale):
+        """
+        :param ale: [Ale] The instance under load.
+        """
+
+        QObject.__init__(self)
+        self.ale = ale
+        self.latencies = []
+        self.accepted = {}
+        self.dumps = []
+        self.accept = ale.accept
+        self.dump = ale.dump
+        # Ale calls both through self, so instance attributes wrap them
+        ale.accept = self.counted
+        ale.dump = self.timed
+
+    def eventFilter(self, object, event):
+        start = time.perf_counter()
+        self.ale.eventFilter(object, event)
+        self.latencies.append(time.perf_counter() - start)
+        return False
+
+    def counted(self, t, data, release=True):
+        self.accepted[data.type] = self.accepted.get(data.type, 0) + 1
+        return self.accept(t, data, release)
+
+    def timed(self, *args, **kwargs):
+        size = self.size()
+        start = time.perf_counter()
+        written, spilled = self.dump(*args, **kwargs)
+        self.dumps.append((time.perf_counter() - start, written,
+                           self.size() - size))
+        return written, spilled
+
+    def size(self):
+        try:
+            return os.path.getsize(self.ale.output)
+        except OSError:
+            return 0
+
+    def pending(self):
+        """
+        :return: [int] Records captured but not written yet.
+        """
+
+        return len(self.ale.logs) + sum(
+            len(buffer.logs) + len(buffer.hlogs)
+            for buffer in self.ale.buffers.all())
+
+
+def replay(app, events, probe, speed=1.0, every=256):
+    """
+    :param app: [QApplication] The application delivering the events.
+    :param events: [list] Events as returned by :func:`schedule`.
+    :param probe: [Probe] The probe installed on the application.
+    :param speed: [float] Multiple of the recorded speed. Entering 0 \
+    sends events as fast as possible.
+    :param every: [int] Events sent between samples of the memory and \
+    pending records, and between event loop runs at full speed.
+    :return: [dict] Elapsed time, lag behind the schedule and peaks.
+    """
+
+    peakMemory = resident()
+    peakPending = 0
+    lag = []
+    start = time.perf_counter()
+    for i, (offset, widget, make, log) in enumerate(events):
+        if speed > 0:
+            due = start + offset / 1000.0 / speed
+            while True:
+                # Let the timers of Ale fire while waiting
+                app.processEvents()
+                wait = due - time.perf_counter()
+                if wait <= 0:
+                    break
+                time.sleep(min(wait, 0.005))
+            lag.append(time.perf_counter() - due)
+        elif i % every == 0:
+            app.processEvents()
+        app.sendEvent(widget, make(widget, log))
+        if i % every == 0:
+            peakPending = max(peakPending, probe.pending())
+            memory = resident()
+            if memory is not None:
+                peakMemory = max(peakMemory, memory)
+    app.processEvents()
+    return {'elapsed': time.perf_counter() - start,
+            'lag': percentiles(lag),
+            'peakMemory': peakMemory,
+            'peakPending': peakPending}
+
+
+def report(events, skipped, run, probe, written, spilled):
+    """
+    :return: [dict] The figures of a replay.
+    """
+
+    sampled = probe.ale.resolution > 0
+    lost = sum(max(0, count - written.get(name, 0))
+               for name, count in probe.accepted.items()
+               if not (sampled and name in SAMPLED))
+    seconds = sum(dump[0] for dump in probe.dumps)
+    logged = sum(dump[1] for dump in probe.dumps)
+    size = sum(dump[2] for dump in probe.dumps)
+    return {
+        'events': {'replayed': len(events), 'skipped': skipped,
+                   'perSecond': round(len(events) / run['elapsed'], 1)},
+        'elapsed': round(run['elapsed'], 3),
+        'scheduleLag': run['lag'],
+        'filter': dict(percentiles(probe.latencies),
+                       calls=len(probe.latencies)),
+        'accepted': probe.accepted,
+        'written': written,
+        'spilled': spilled,
+        'lost': lost,
+        'memory': {'startMB': run['startMemory'],
+                   'peakMB': run['peakMemory'],
+                   'endMB': run['endMemory'],
+                   'growthMB': round(run['endMemory'] - run['startMemory'], 2)
+                   if run['endMemory'] is not None else None,
+                   'peakPending': run['peakPending']},
+        'sink': {'dumps': len(probe.dumps), 'logs': logged, 'bytes': size,
+                 'seconds': round(seconds, 3),
+                 'logsPerSecond': round(logged / seconds, 1)
+                 if seconds else None,
+                 'mbPerSecond': round(size / seconds / 2.0 ** 20, 2)
+                 if seconds else None}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Replay a userale log through Ale to measure its load.')
+    parser.add_argument('path', help='recorded userale log file')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='multiple of the recorded speed, 0 for as '
+                             'fast as possible (default 1)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='number of times the log is played '
+                             '(default 1)')
+    parser.add_argument('--output', default=None,
+                        help='log file written by Ale (default: a '
+                             'temporary file)')
+    parser.add_argument('--interval', type=int, default=5000,
+                        help='interval of Ale in ms (default 5000)')
+    parser.add_argument('--resolution', type=int, default=100,
+                        help='resolution of Ale in ms (default 100)')
+    parser.add_argument('--keylog', action='store_true',
+                        help='log keypress and keyrelease events')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    output = args.output or os.path.join(tempfile.mkdtemp(), 'replay.log')
+    for path in (output, output + '.spill'):
+        if os.path.exists(path):
+            parser.error('{} already exists'.format(path))
+
+    tree = WidgetTree()
+    events, skipped = schedule(args.path, tree, args.repeat)
+    # Deliver the events of showing windows before measuring
+    app.processEvents()
+    ale = Ale(output=output, interval=args.interval,
+              resolution=args.resolution, keylog=args.keylog,
+              spill=output + '.spill')
+    probe = Probe(ale)
+    app.installEventFilter(probe)
+
+    startMemory = resident()
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            run = replay(app, events, probe, args.speed)
+            written, spilled = ale.cleanup()
+    app.removeEventFilter(probe)
+    run['startMemory'] = startMemory
+    run['endMemory'] = resident()
+
+    counts = {}
+    if os.path.exists(output):
+        for log in logs(output):
+            counts[log['type']] = counts.get(log['type'], 0) + 1
+    print (json.dumps(report(events, skipped, run, probe, counts, spilled),
+                      indent=2))
@@ -0,0 +1,273 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import sys
+import threading
+import traceback
+
+from PyQt5.QtCore import QEvent, QTimer
+from PyQt5.QtGui import QWindow
+from userale.record import LogEvent
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+# Upper bounds in ms of the histogram buckets; the last bucket counts
+# everything above
+BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram (object):
+    """
+    Latencies counted in fixed, roughly logarithmic buckets.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        """
+        :param ms: [float] A latency in ms.
+        """
+
+        index = 0
+        while index < len(BOUNDS) and ms > BOUNDS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def encode(self):
+        """
+        :return: [dict] The histogram as logged.
+        """
+
+        return {"bounds": list(BOUNDS),
+                "counts": self.counts,
+                "count": self.count,
+                "mean": round(self.total / self.count, 2)
+                if self.count else None,
+                "max": round(self.max, 2)}
+
+
+class ResponsivenessMonitor (object):
+    """
+    Measure how quickly the instrumented application responds.
+
+    Three figures are kept:
+
+    * dispatch: delay between an input event and its delivery. Qt input
+      timestamps use their own clock, so the delay is relative to the
+      fastest delivery seen, as estimated by the Clock.
+    * paint: time from a mouse press or key press to the next Paint or
+      UpdateRequest of the same window.
+    * stalls: gaps in a heartbeat timer run by the event loop longer
+      than the threshold. A watchdog thread notices ongoing stalls and
+      takes the Python stack of the stalled thread, which shows the
+      code blocking the event loop.
+
+    Histograms are emitted as a responsiveness log with every batch,
+    and every stall as a stall log once the event loop is back. The
+    heartbeat wakes the event loop twice per threshold.
+    """
+
+    # Log types written
+    types = ('responsiveness', 'stall')
+
+    # Input events whose dispatch delay is measured
+    inputs = (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+              QEvent.MouseButtonDblClick, QEvent.MouseMove,
+              QEvent.KeyPress, QEvent.KeyRelease, QEvent.Wheel)
+
+    # Input events waiting for a response, and the responses
+    actions = (QEvent.MouseButtonPress, QEvent.KeyPress)
+    responses = (QEvent.Paint, QEvent.UpdateRequest)
+
+    events = frozenset(inputs + responses)
+
+    def __init__(self, clock, emit, stall=200, timeout=5000):
+        """
+        :param clock: [Clock] The clock timing the events.
+        :param emit: [callable] Receives the raw record of each stall.
+        :param stall: [int] Shortest gap in ms of the event loop logged \
+        as a stall.
+        :param timeout: [int] Time in ms after which an action without \
+        a response is no longer waited for.
+        """
+
+        self.clock = clock
+        self.emit = emit
+        self.stall = stall
+        self.timeout = timeout
+        self.last = None
+        self.waiting = {}
+        self.reset()
+
+        self.timer = None
+        self.thread = None
+        self.ident = None
+        self.heartbeat = None
+        self.stack = None
+        self.stopped = threading.Event()
+
+    def reset(self):
+        self.dispatch = Histogram()
+        self.paint = Histogram()
+        self.startTime = None
+
+    def add(self, t, event, object):
+        """
+        :param t: [QEvent.Type] One of the types in self.events.
+        :param event: [QEvent] The event.
+        :param object: [QObject] The object receiving the event.
+        :return: [bool] True if this started new histograms.
+        """
+
+        started = self.startTime is None
+        if started:
+            self.startTime = self.clock.now()
+
+        if t in self.responses:
+            if self.waiting:
+                start = self.waiting.pop(self.window(object), None)
+                if start is not None:
+                    ms = self.clock.monotonic() - start
+                    if ms <= self.timeout:
+                        self.paint.add(ms)
+            return started
+
+        timestamp = event.timestamp()
+        # Synthesized events carry no timestamp, and every delivery of
+        # an event up the parent chain is counted once
+        if timestamp and (t, timestamp) != self.last:
+            self.last = (t, timestamp)
+            now = self.clock.now()
+            self.dispatch.add(now - self.clock.eventTime(timestamp, now))
+            if t in self.actions:
+                key = self.window(object)
+                if key is not None and key not in self.waiting:
+                    self.waiting[key] = self.clock.monotonic()
+        return started
+
+    def window(self, object):
+        """
+        :param object: [QObject] A widget or window.
+        :return: [int] Key of the native window showing it, or None.
+        """
+
+        try:
+            if object.isWidgetType():
+                object = object.window().windowHandle()
+            elif not isinstance(object, QWindow):
+                return None
+            return sip.unwrapinstance(object) if object is not None \
+                else None
+        except RuntimeError:
+            return None
+
+    def flush(self):
+        """
+        :return: [list] Raw record of the histograms, which are reset.
+        """
+
+        if self.startTime is None:
+            return []
+        details = {"startTime": self.startTime,
+                   "endTime": self.clock.now(),
+                   "dispatch": self.dispatch.encode(),
+                   "paint": self.paint.encode()}
+        record = LogEvent(None, "responsiveness", self.startTime,
+                          details=details)
+        self.reset()
+        return [record]
+
+    def start(self, parent):
+        """
+        :param parent: [QObject] Owner of the heartbeat timer, living in \
+        the thread whose event loop is watched.
+        """
+
+        self.ident = threading.get_ident()
+        self.timer = QTimer(parent)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start(max(1, self.stall // 2))
+        self.thread = threading.Thread(target=self.watch,
+                                       name="userale-watchdog")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the heartbeat and the watchdog thread.
+        """
+
+        self.stopped.set()
+        if self.timer is not None:
+            try:
+                self.timer.stop()
+            except RuntimeError:
+                # Already deleted with its parent at exit
+                pass
+            self.timer = None
+        if self.thread is not None:
+            if self.thread is not threading.current_thread():
+                self.thread.join(1.0)
+            self.thread = None
+
+    def beat(self):
+        """
+        Heartbeat run by the event loop. Logs the stall that ended, if
+        any.
+        """
+
+        now = self.clock.monotonic()
+        last, self.heartbeat = self.heartbeat, now
+        taken, self.stack = self.stack, None
+        if last is None:
+            return
+        # Only a stack taken during this gap belongs to it
+        stack = taken[1] if taken is not None and taken[0] == last else None
+        gap = now - last - self.timer.interval()
+        if gap >= self.stall:
+            startTime = int(self.clock.now() - (now - last))
+            details = {"startTime": startTime,
+                       "endTime": startTime + int(now - last),
+                       "duration": int(gap),
+                       "stack": stack}
+            self.emit(LogEvent(None, "stall", startTime, details=details))
+
+    def watch(self):
+        """
+        Watchdog loop, run by its own thread.
+        """
+
+        while not self.stopped.wait(self.stall / 2000.0):
+            last = self.heartbeat
+            if last is None or self.stack is not None:
+                continue
+            if self.clock.monotonic() - last > self.stall:
+                frame = sys._current_frames().get(self.ident)
+                if frame is not None:
+                    self.stack = (last, traceback.format_stack(frame)[-20:])
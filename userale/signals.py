@@ -0,0 +1,195 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from functools import partial
+
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtWidgets import QAbstractButton, QAbstractItemView, \
+    QAbstractSlider, QAbstractSpinBox, QAction, QApplication, QComboBox, \
+    QLineEdit, QTabBar
+from userale.record import LogEvent
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+
+class SignalCapture (QObject):
+    """
+    Log user actions from the high level signals of widgets and actions.
+
+    A click on a button is logged as a single click log instead of the
+    mouseenter, mousedown, mouseup and mouseleave logs leading to it.
+    Widgets are connected when they are polished, before they are first
+    shown, and actions when they are added to a widget. Only signals
+    emitted on user interaction are used: a combo box is logged when an
+    item is chosen, not whenever its current index changes.
+    """
+
+    # Classes, their signal and the slot logging it
+    signals = (
+        (QAbstractButton, 'clicked', 'clicked'),
+        (QAction, 'triggered', 'triggered'),
+        (QComboBox, 'activated[int]', 'activated'),
+        (QLineEdit, 'editingFinished', 'edited'),
+        (QAbstractSpinBox, 'editingFinished', 'edited'),
+        (QAbstractSlider, 'sliderReleased', 'slid'),
+        (QTabBar, 'tabBarClicked', 'tabClicked'),
+        (QAbstractItemView, 'activated', 'itemActivated')
+    )
+
+    # Log types written by the slots
+    types = ('click', 'trigger', 'select', 'change', 'slide', 'tab',
+             'activate')
+
+    # Events announcing a widget or an action
+    events = frozenset((QEvent.Polish, QEvent.ActionAdded))
+
+    def __init__(self, clock, emit, keylog=False, parent=None):
+        """
+        :param clock: [Clock] The clock timing the actions.
+        :param emit: [callable] Receives the raw record of each action.
+        :param keylog: [bool] Keep the text of edited fields.
+        :param parent: [QObject] Owner of the connections.
+        """
+
+        QObject.__init__(self, parent)
+        self.clock = clock
+        self.emit = emit
+        self.keylog = keylog
+        self.connected = set()
+        # Last text logged per edited widget
+        self.edits = {}
+
+    def add(self, event, object):
+        """
+        :param event: [QEvent] A Polish or ActionAdded event.
+        :param object: [QObject] The object receiving the event.
+        """
+
+        if event.type() == QEvent.ActionAdded:
+            object = event.action()
+        self.connect(object)
+
+    def scan(self):
+        """
+        Connect the widgets that exist already, and their actions.
+        """
+
+        app = QApplication.instance()
+        if not isinstance(app, QApplication):
+            return
+        for widget in app.allWidgets():
+            self.connect(widget)
+            for action in widget.actions():
+                self.connect(action)
+
+    def connect(self, object):
+        """
+        :param object: [QObject] A widget or an action.
+        """
+
+        try:
+            key = sip.unwrapinstance(object)
+        except (TypeError, RuntimeError):
+            return
+        if key in self.connected:
+            return
+        connected = False
+        for cls, signal, slot in self.signals:
+            if isinstance(object, cls) and not self.inner(object, cls):
+                name, _, overload = signal.partition('[')
+                bound = getattr(object, name)
+                if overload:
+                    bound = bound[int]
+                bound.connect(getattr(self, slot))
+                connected = True
+        if connected:
+            self.connected.add(key)
+            object.destroyed.connect(partial(self.forget, key))
+
+    def inner(self, object, cls):
+        """
+        :return: [bool] True for the line edit of a spin box or combo \
+        box, whose edits are logged by the outer widget.
+        """
+
+        return cls is QLineEdit and \
+            isinstance(object.parent(), (QAbstractSpinBox, QComboBox))
+
+    def forget(self, key, *args):
+        """
+        :param key: [int] Address of a destroyed object.
+        """
+
+        self.connected.discard(key)
+        self.edits.pop(key, None)
+
+    def log(self, type, details):
+        """
+        :param type: [str] The log type of the action.
+        :param details: [dict] Type specific fields.
+        """
+
+        self.emit(LogEvent(self.sender(), type, self.clock.now(),
+                           details=details))
+
+    def clicked(self, *args):
+        button = self.sender()
+        details = {"text": button.text()}
+        if button.isCheckable():
+            details["checked"] = button.isChecked()
+        self.log("click", details)
+
+    def triggered(self, *args):
+        action = self.sender()
+        details = {"text": action.text()}
+        if action.isCheckable():
+            details["checked"] = action.isChecked()
+        self.log("trigger", details)
+
+    def activated(self, index):
+        self.log("select", {"index": index,
+                            "text": self.sender().itemText(index)})
+
+    def edited(self, *args):
+        widget = self.sender()
+        text = widget.text()
+        # editingFinished follows both Return and the loss of focus
+        key = sip.unwrapinstance(widget)
+        if self.edits.get(key) == text:
+            return
+        self.edits[key] = text
+        details = {"length": len(text)}
+        if self.keylog or isinstance(widget, QAbstractSpinBox):
+            details["text"] = text
+        self.log("change", details)
+
+    def slid(self, *args):
+        self.log("slide", {"value": self.sender().value()})
+
+    def tabClicked(self, index):
+        self.log("tab", {"index": index,
+                         "text": self.sender().tabText(index)})
+
+    def itemActivated(self, index):
+        text = index.data()
+        self.log("activate", {"row": index.row(),
+                              "column": index.column(),
+                              "text": text if text is None or
+                              isinstance(text, (str, int, float))
+                              else str(text)})
@@ -0,0 +1,80 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+
+
+class FileSink (object):
+    """
+    Append-only log file owned by a single Ale.
+
+    Every batch is written as one line. The file is opened on the first
+    write, so an Ale that never logs anything never touches the disk.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: [str] The file to which logs are appended.
+        """
+
+        self.path = path
+        self.file = None
+
+    def write(self, data):
+        """
+        :param data: [memoryview] Encoded batches, each ending with a \
+        newline.
+        """
+
+        if self.file is None:
+            self.file = open(self.path, "ab")
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self):
+        """
+        Close the file. It is reopened by the next write.
+        """
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class StreamSink (object):
+    """
+    Echo of the batches on standard output.
+
+    The stream is looked up on every write, so redirecting sys.stdout
+    also redirects the echo.
+    """
+
+    def write(self, data):
+        """
+        :param data: [memoryview] Encoded batches, each ending with a \
+        newline.
+        """
+
+        stream = sys.stdout
+        buffer = getattr(stream, "buffer", None)
+        if buffer is not None:
+            stream.flush()
+            buffer.write(data)
+            buffer.flush()
+        else:
+            stream.write(bytes(data).decode("utf-8"))
+
+    def close(self):
+        pass
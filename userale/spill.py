@@ -0,0 +1,80 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+from operator import attrgetter
+
+# Raw fields of a record, in the order they are spilled
+FIELDS = ('target', 'path', 'clientTime', 'x', 'y', 'type', 'details',
+          'latency', 'context')
+
+
+def write(path, header, records):
+    """
+    :param path: [str] The spill file, appended to.
+    :param header: [dict] Fields shared by every log of the session, \
+    under "fields", and whether logs carry their capture latency and \
+    context, under "latency" and "context".
+    :param records: [list] Described records, see ``Ale.resolve``.
+
+    Spill records as columns of their raw fields, without building
+    their logs. Every call appends one line to the file, holding the
+    header and the columns as a JSON array. The file only holds data,
+    so reading it back never runs code.
+    """
+
+    columns = [list(map(attrgetter(field), records)) for field in FIELDS]
+    data = json.dumps([header, columns], separators=(',', ':'))
+    with open(path, 'ab') as f:
+        f.write(data.encode('utf-8') + b'\n')
+
+
+def load(path):
+    """
+    :param path: [str] A spill file.
+    :return: [generator] The spilled logs, as they would have been \
+    written to the output. Lines that cannot be parsed, such as one cut \
+    by a crash, are skipped.
+    """
+
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                header, columns = json.loads(line.decode('utf-8'))
+            except (ValueError, TypeError):
+                continue
+            if not isinstance(header, dict) or \
+                    not isinstance(columns, list) or \
+                    len(columns) != len(FIELDS):
+                continue
+            for row in zip(*columns):
+                record = dict(zip(FIELDS, row))
+                x, y = record['x'], record['y']
+                log = {
+                    "target": record['target'],
+                    "path": record['path'],
+                    "clientTime": record['clientTime'],
+                    "location": {"x": x, "y": y} if x is not None else None,
+                    "type": record['type'],
+                    "userAction": True,   # legacy field
+                    "details": record['details'] or {}
+                }
+                log.update(header['fields'])
+                if header['latency']:
+                    log["captureLatency"] = record['latency']
+                if header['context']:
+                    log["context"] = record['context']
+                yield log
@@ -0,0 +1,62 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import atexit
+import os
+
+import pytest
+
+# Widgets are created without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+from userale.ale import Ale
+
+
+@pytest.fixture(scope='session')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def make_ale(app, tmpdir):
+    """
+    Factory of Ale instances writing to a temporary output. Once the
+    test is done they are taken off the exit handlers and deleted, which
+    removes them from the objects they filter.
+    """
+
+    instances = []
+
+    def make(**options):
+        options.setdefault('output', str(tmpdir.join('userale.log')))
+        ale = Ale(**options)
+        instances.append(ale)
+        return ale
+
+    yield make
+    for ale in instances:
+        atexit.unregister(ale.cleanup)
+        if ale.monitor is not None:
+            ale.monitor.stop()
+        sip.delete(ale)
+
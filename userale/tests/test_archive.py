@@ -0,0 +1,76 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import json
+import os
+
+from userale.archive import convert_archive
+from userale.reader import logs
+
+DAY = 86400000
+
+
+def log(session, clientTime):
+    return {"session": session, "clientTime": clientTime, "type": "click"}
+
+
+def test_sorted_partitions(tmpdir):
+    plain = str(tmpdir.join("userale.log"))
+    with open(plain, "w") as f:
+        for t in (50, 10, 30):
+            f.write(json.dumps([log("a", t), log("b", DAY + t)]) + "\n")
+        f.write("garbage\n")
+    packed = str(tmpdir.join("archive.ndjson.gz"))
+    with gzip.open(packed, "wt") as f:
+        for t in (40, 20):
+            f.write(json.dumps(log("a", t)) + "\n")
+            f.write(json.dumps(log("c", DAY + t)) + "\n")
+
+    output = str(tmpdir.join("output"))
+    manifest = convert_archive([plain, packed], output, workers=2, size=64,
+                               buckets=1)
+    assert manifest["count"] == 10
+    assert manifest["errors"] == 1
+
+    partitions = dict((entry["name"], entry)
+                      for entry in manifest["partitions"])
+    assert sorted(partitions) == ["1970-01-01-000", "1970-01-02-000"]
+    first = partitions["1970-01-01-000"]
+    assert first["sessions"] == {"a": {"minTime": 10, "maxTime": 50,
+                                       "count": 5}}
+    assert [entry["clientTime"] for entry in
+            logs(os.path.join(output, first["path"]))] == [10, 20, 30, 40, 50]
+    second = partitions["1970-01-02-000"]
+    assert [(entry["session"], entry["clientTime"] - DAY) for entry in
+            logs(os.path.join(output, second["path"]))] == \
+        [("b", 10), ("b", 30), ("b", 50), ("c", 20), ("c", 40)]
+
+
+def test_truncated_gzip(tmpdir):
+    packed = str(tmpdir.join("archive.ndjson.gz"))
+    with gzip.open(packed, "wt") as f:
+        for t in range(1000):
+            f.write(json.dumps(log("a", t)) + "\n")
+    with open(packed, "rb") as f:
+        data = f.read()
+    with open(packed, "wb") as f:
+        f.write(data[:len(data) // 2])
+
+    manifest = convert_archive([packed], str(tmpdir.join("output")),
+                               workers=1)
+    assert manifest["errors"] >= 1
+    assert 0 < manifest["count"] < 1000
@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QPushButton, QWidget
+
+from userale.tests import written
+
+try:
+    from PyQt5 import sip
+except ImportError:
+    import sip
+
+SHUTOFF = ["mouseenter", "mouseleave", "move", "resize"]
+
+
+def test_deleted_target_is_described(app, make_ale):
+    ale = make_ale(resolution=0, shutoff=SHUTOFF)
+    window = QWidget()
+    window.setObjectName("win")
+    button = QPushButton("OK", window)
+    button.setObjectName("okButton")
+    button.clicked.connect(button.deleteLater)
+    window.show()
+    QTest.qWaitForWindowExposed(window)
+    ale.install(button)
+
+    QTest.mouseClick(button, Qt.LeftButton)
+    QTest.qWait(10)
+    assert sip.isdeleted(button)
+    ale.dump()
+
+    logs = written(ale)
+    assert [log["type"] for log in logs] == ["mousedown", "mouseup"]
+    for log in logs:
+        assert log["target"] == "okButton"
+        assert log["path"] == ["win", "okButton"]
+
+
+def test_only_the_sample_is_described(app, make_ale):
+    ale = make_ale(resolution=50)
+    widget = QWidget()
+    widget.setObjectName("tracked")
+    widget.setMouseTracking(True)
+    widget.show()
+    ale.install(widget)
+    for x in range(20):
+        app.sendEvent(widget, QMouseEvent(QEvent.MouseMove, QPointF(x, 5),
+                                          Qt.NoButton, Qt.NoButton,
+                                          Qt.NoModifier))
+    buffer = ale.buffers.get()
+    assert len(buffer.hlogs) == 20
+    assert all(record.target is None for record in buffer.hlogs)
+
+    ale.aggregate()
+    assert len(ale.logs) == 1
+    record = ale.logs[0]
+    assert record.object is None
+    assert record.target == "tracked"
+    assert record.path == ["tracked"]
@@ -0,0 +1,53 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import json
+import os
+
+from userale.collector import Collector
+from userale.reader import logs
+
+
+def batch(session, types):
+    return [{"session": session, "clientTime": 0, "type": type}
+            for type in types]
+
+
+def test_one_batch_per_line(tmpdir):
+    directory = str(tmpdir)
+    collector = Collector(directory)
+
+    pretty = json.dumps(batch("a", ["click"]), indent=2)
+    compact = json.dumps(batch("a", ["mousedown", "mouseup"]))
+
+    async def post():
+        await collector.start(port=0)
+        await asyncio.gather(collector.ingest(pretty.encode('utf-8')),
+                             collector.ingest(compact.encode('utf-8')))
+        await collector.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(post())
+    finally:
+        loop.close()
+
+    path = os.path.join(directory, "1970-01-01", "a.log")
+    with open(path, "rb") as f:
+        assert len(f.read().splitlines()) == 2
+    assert [log["type"] for log in logs(path)] == \
+        ["click", "mousedown", "mouseup"]
@@ -0,0 +1,47 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+from datetime import datetime
+
+import pytest
+
+numpy = pytest.importorskip("numpy")
+
+from userale import columnar  # noqa: E402
+
+
+def test_mixed_types(tmpdir):
+    path = str(tmpdir.join("userale.log"))
+    iso = "2019-05-04 12:30:00.250000"
+    logs = [
+        {"type": "click", "clientTime": 1500, "location": {"x": 1, "y": 2}},
+        {"type": "click", "clientTime": iso, "location": {"x": "1", "y": 2}},
+        {"type": "click", "clientTime": "soon", "location": "here"},
+        {"type": "click", "clientTime": 2 ** 70, "location": None},
+        {"type": "click", "clientTime": None,
+         "location": {"x": 1.5, "y": -2 ** 40}},
+    ]
+    with open(path, "w") as f:
+        f.write(json.dumps(logs) + "\n")
+
+    table = columnar.load(path, cache=str(tmpdir.join("cache")))
+    expected = int(datetime.strptime(iso, "%Y-%m-%d %H:%M:%S.%f")
+                   .timestamp() * 1000.0)
+    assert list(table["time"]) == [1500, expected, 0, 0, 0]
+    missing = columnar.MISSING
+    assert list(table["x"]) == [1, missing, missing, missing, 1]
+    assert list(table["y"]) == [2, 2, missing, missing, missing]
@@ -0,0 +1,56 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtWidgets import QWidget
+
+from userale.tests import written
+
+SHUTOFF = ["mouseenter", "mouseleave", "mousedown", "mouseup"]
+
+
+def test_shutoff_subsystem_logs(app, make_ale):
+    ale = make_ale(resolution=0, dwell=True, heatmap=4, shutoff=SHUTOFF)
+    ale.reconfigure({"version": 1, "shutoff": SHUTOFF + ["heatmap"]})
+    widget = QWidget()
+    widget.show()
+    ale.install(widget)
+    app.sendEvent(widget, QEvent(QEvent.Enter))
+    app.sendEvent(widget, QMouseEvent(QEvent.MouseButtonPress,
+                                      QPointF(5, 5), Qt.LeftButton,
+                                      Qt.LeftButton, Qt.NoModifier))
+    app.sendEvent(widget, QEvent(QEvent.Leave))
+    ale.dump()
+    assert [log["type"] for log in written(ale)] == ["dwell"]
+
+    ale.reconfigure({"version": 2, "shutoff": SHUTOFF + ["dwell"]})
+    app.sendEvent(widget, QEvent(QEvent.Enter))
+    app.sendEvent(widget, QMouseEvent(QEvent.MouseButtonPress,
+                                      QPointF(5, 5), Qt.LeftButton,
+                                      Qt.LeftButton, Qt.NoModifier))
+    app.sendEvent(widget, QEvent(QEvent.Leave))
+    ale.dump()
+    assert [log["type"] for log in written(ale)] == ["dwell", "heatmap"]
+
+
+def test_unknown_types_are_rejected(app, make_ale):
+    ale = make_ale()
+    for name in ("bogus", "stall", "dwell"):
+        with pytest.raises(ValueError):
+            ale.reconfigure({"version": 1, "shutoff": [name]})
+    ale.reconfigure({"version": 1, "shutoff": ["typing", "mousemove"]})
@@ -0,0 +1,45 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QPushButton
+
+from userale.tests import written
+
+SHUTOFF = ["mouseenter", "mouseleave", "move", "resize"]
+
+
+def test_context_described_at_capture(app, make_ale):
+    ale = make_ale(context=True, resolution=0, shutoff=SHUTOFF)
+    button = QPushButton("Go")
+    button.setObjectName("goButton")
+    button.clicked.connect(lambda: button.setText("Changed"))
+    button.show()
+    QTest.qWaitForWindowExposed(button)
+    ale.install(button)
+
+    QTest.mouseClick(button, Qt.LeftButton)
+    # The new text is repainted, then clicked
+    QTest.qWait(50)
+    QTest.mouseClick(button, Qt.LeftButton)
+    ale.dump()
+
+    logs = written(ale)
+    assert [log["type"] for log in logs] == ["mousedown", "mouseup"] * 2
+    assert [log["context"]["text"] for log in logs] == \
+        ["Go", "Go", "Changed", "Changed"]
+    assert logs[0]["context"]["className"] == "QPushButton"
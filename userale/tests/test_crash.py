@@ -0,0 +1,53 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QPushButton
+
+from userale.crash import recover
+
+SHUTOFF = ["mouseenter", "mouseleave", "move", "resize"]
+
+
+def test_ring_keeps_sampled_records(app, make_ale, tmpdir):
+    path = str(tmpdir.join("crash.ring"))
+    ale = make_ale(crash=path, resolution=50, shutoff=SHUTOFF)
+    button = QPushButton("Go")
+    button.setObjectName("goButton")
+    button.setMouseTracking(True)
+    button.show()
+    QTest.qWaitForWindowExposed(button)
+    ale.install(button)
+
+    for x in range(200):
+        app.sendEvent(button, QMouseEvent(QEvent.MouseMove, QPointF(x, 5),
+                                          Qt.NoButton, Qt.NoButton,
+                                          Qt.NoModifier))
+    QTest.mouseClick(button, Qt.LeftButton)
+    assert ale.crash.seq == 2
+
+    ale.aggregate()
+    session, records = recover(path)
+    assert session == ale.session
+    assert [record["type"] for record in records] == \
+        ["mousedown", "mouseup", "mousemove"]
+    assert all(record["target"] == "goButton" for record in records)
+
+    # Written records are not recovered
+    ale.dump()
+    assert recover(path)[1] == []
@@ -0,0 +1,119 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import multiprocessing
+import os
+import time
+
+from userale.daemon import DaemonSink, FRAME, LogDaemon
+from userale.format import BatchBuffer
+
+
+def encoded_batch(producer, count):
+    """
+    :return: [bytes] One encoded batch of count logs of a producer.
+    """
+
+    buffer = BatchBuffer()
+    buffer.add([{"type": "mousemove", "clientTime": i,
+                 "details": {"producer": producer}}
+                for i in range(count)])
+    with buffer.view() as view:
+        return bytes(view)
+
+
+def produce(output, address, producer, batches):
+    data = encoded_batch(producer, 20)
+    sink = DaemonSink(output, address)
+    for _ in range(batches):
+        sink.write(memoryview(data))
+    sink.close()
+
+
+def test_cut_batch_is_dropped(tmpdir):
+    output = str(tmpdir.join('partial.log'))
+    daemon = LogDaemon(output, str(tmpdir.join('partial.sock')),
+                       linger=0.2)
+    assert daemon.bind()
+    sink = DaemonSink(output, daemon.address)
+    data = encoded_batch(0, 3)
+    sink.write(memoryview(data))
+    # A frame announcing more bytes than are sent before disconnecting
+    sink.socket.sendall(FRAME.pack(len(data)) + data[:10])
+    sink.close()
+    try:
+        daemon.serve()
+    finally:
+        daemon.close()
+
+    with open(output, 'rb') as f:
+        assert f.read() == data
+    assert not os.path.exists(daemon.address)
+
+
+def test_single_writer(tmpdir):
+    output = str(tmpdir.join('shared.log'))
+    address = str(tmpdir.join('shared.sock'))
+    first = LogDaemon(output, address)
+    second = LogDaemon(output, address)
+    try:
+        assert first.bind()
+        assert not second.bind(wait=0.05)
+    finally:
+        first.close()
+
+
+def test_processes_share_one_writer(tmpdir):
+    output = str(tmpdir.join('fanin.log'))
+    address = str(tmpdir.join('fanin.sock'))
+    processes = [multiprocessing.Process(target=produce,
+                                         args=(output, address, i, 50))
+                 for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    counts = {}
+    # The writer was started on demand and flushes each round
+    for _ in range(100):
+        counts = {}
+        if os.path.exists(output):
+            with open(output, 'rb') as f:
+                for line in f:
+                    producer = json.loads(line.decode('utf-8'))[0]
+                    producer = producer['details']['producer']
+                    counts[producer] = counts.get(producer, 0) + 1
+        if sum(counts.values()) == 200:
+            break
+        time.sleep(0.05)
+    assert counts == {0: 50, 1: 50, 2: 50, 3: 50}
+    assert not [name for name in os.listdir(str(tmpdir))
+                if name.startswith('fanin.log.')]
+
+
+def test_fallback_to_process_file(tmpdir):
+    output = str(tmpdir.join('fallback.log'))
+    address = str(tmpdir.join('missing', 'fallback.sock'))
+    sink = DaemonSink(output, address, timeout=0.5)
+    data = encoded_batch(0, 3)
+    sink.write(memoryview(data))
+    sink.write(memoryview(data))
+    sink.close()
+    with open('{}.{}'.format(output, os.getpid()), 'rb') as f:
+        assert f.read() == data * 2
+    assert not os.path.exists(output)
@@ -0,0 +1,107 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPoint, QSize, Qt
+from PyQt5.QtGui import QResizeEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QFrame, QLabel, QPushButton, QVBoxLayout, \
+    QWidget
+
+from userale.tests import written
+
+CLICKS = 20
+MOVES = 50
+SHUTOFF = ["mouseenter", "mouseleave", "move", "resize"]
+
+
+class ExampleWidget (QWidget):
+    """
+    A label nested in a frame. Labels ignore mouse events, so Qt
+    propagates each of them up the parent chain.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        frame = QFrame(self)
+        frame.setObjectName("testFrame")
+        self.label = QLabel("Nested label", frame)
+        self.label.setObjectName("testLabel")
+        QVBoxLayout(frame).addWidget(self.label)
+
+        button = QPushButton("Button", self)
+        button.setObjectName("testButton")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(frame)
+        layout.addWidget(button)
+
+        self.setObjectName("dedupWidget")
+        self.setGeometry(300, 300, 300, 150)
+
+
+def counts(logs):
+    counts = {}
+    for log in logs:
+        counts[log["type"]] = counts.get(log["type"], 0) + 1
+    return counts
+
+
+def test_one_log_per_action(app, make_ale, tmpdir):
+    ale = make_ale(output=str(tmpdir.join("dedup.log")), resolution=0,
+                   shutoff=SHUTOFF, dedup=50)
+    app.installEventFilter(ale)
+    try:
+        ex = ExampleWidget()
+        ex.show()
+        QTest.qWaitForWindowExposed(ex)
+        for i in range(MOVES):
+            QTest.mouseMove(ex.label, QPoint(5 + i % 20, 5))
+            QTest.qWait(1)
+        for i in range(CLICKS):
+            QTest.mouseClick(ex.label, Qt.LeftButton, pos=QPoint(10, 5))
+            QTest.qWait(1)
+    finally:
+        app.removeEventFilter(ale)
+    ale.dump()
+
+    assert counts(written(ale)) == {"mousedown": CLICKS, "mouseup": CLICKS,
+                                    "mousemove": MOVES}
+    assert ale.dedup.dropped > 0
+
+
+def test_enter_without_position(app, make_ale):
+    ale = make_ale(resolution=0, dedup=50)
+    widget = QWidget()
+    widget.show()
+    ale.install(widget)
+    app.sendEvent(widget, QEvent(QEvent.Enter))
+    ale.dump()
+
+    assert [log["type"] for log in written(ale)] == ["mouseenter"]
+
+
+def test_resizes_are_kept(app, make_ale):
+    ale = make_ale(resolution=0, dedup=50)
+    widget = QWidget()
+    widget.show()
+    ale.install(widget)
+    for width in (100, 200, 300):
+        app.sendEvent(widget, QResizeEvent(QSize(width, 100),
+                                           QSize(-1, -1)))
+    ale.dump()
+
+    assert [log["type"] for log in written(ale)] == ["resize"] * 3
@@ -0,0 +1,98 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import contextlib
+import io
+import json
+
+from userale.format import BatchBuffer, JsonFormatter
+from userale.record import LogEvent
+
+
+def sample_logs(count):
+    """
+    :param count: [int] Number of logs.
+    :return: [list] Logs shaped like the output of Ale, including text \
+    that needs escaping.
+    """
+
+    return [{
+        "target": "testLineEdit",
+        "path": ["Example", "testFrame", "testLineEdit"],
+        "clientTime": 1700000000000 + i,
+        "location": {"x": i % 300, "y": i % 200},
+        "type": "mousemove",
+        "details": {"text": "line\nbreak \"quoted\" café ✓"}
+        if i % 10 == 0 else {}
+    } for i in range(count)]
+
+
+def batches(logs, chunk):
+    return [logs[i:i + chunk] for i in range(0, len(logs), chunk)]
+
+
+def encoded(buffer):
+    with buffer.view() as view:
+        return bytes(view)
+
+
+def test_one_array_per_line():
+    parts = batches(sample_logs(1200), 500)
+    buffer = BatchBuffer()
+    for part in parts:
+        buffer.add(part)
+    lines = encoded(buffer).split(b"\n")
+    assert lines[-1] == b""
+    assert [json.loads(line.decode("utf-8")) for line in lines[:-1]] == parts
+
+
+def test_same_bytes_as_formatter():
+    parts = batches(sample_logs(1200), 500)
+    buffer = BatchBuffer()
+    for part in parts:
+        buffer.add(part)
+    former = "".join("%s\n" % JsonFormatter(part) for part in parts)
+    assert encoded(buffer) == former.encode("utf-8")
+
+
+def test_clear_resets_buffer():
+    first, second = batches(sample_logs(20), 10)
+    buffer = BatchBuffer()
+    buffer.add(first)
+    buffer.clear()
+    buffer.add(second)
+    assert buffer.batches == 1
+    assert encoded(buffer) == ("%s\n" % JsonFormatter(second)).encode("utf-8")
+
+
+def test_sinks_share_one_encoding(app, make_ale):
+    ale = make_ale(session="encode")
+    for i in range(1234):
+        ale.logs.append(LogEvent(None, "mousedown", i, i, i,
+                                 {"text": "a\nb"} if i % 7 == 0 else None))
+    echo = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    with contextlib.redirect_stdout(echo):
+        assert ale.dump(deadline=10000, chunk=100) == (1234, 0)
+        echo.flush()
+    with open(ale.output, "rb") as f:
+        data = f.read()
+
+    assert echo.buffer.getvalue() == data
+    lines = data.split(b"\n")
+    assert len(lines) == 14 and lines[-1] == b""
+    logs = [log for line in lines[:-1]
+            for log in json.loads(line.decode("utf-8"))]
+    assert [log["clientTime"] for log in logs] == list(range(1234))
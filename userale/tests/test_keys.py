@@ -0,0 +1,45 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, Qt
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QLineEdit
+
+from userale.tests import written
+
+
+def test_typing_carries_latency(app, make_ale):
+    ale = make_ale(resolution=0, keygap=1000, latency=True)
+    edit = QLineEdit()
+    edit.setObjectName("edit")
+    edit.show()
+    QTest.qWaitForWindowExposed(edit)
+    QApplication.setActiveWindow(edit)
+    edit.setFocus()
+    ale.install(edit)
+    for i, text in enumerate("abc"):
+        event = QKeyEvent(QEvent.KeyPress, Qt.Key_A + i, Qt.NoModifier,
+                          text)
+        event.setTimestamp(1000 + i)
+        app.sendEvent(edit, event)
+    ale.flushTyping()
+    ale.dump()
+
+    logs = written(ale)
+    assert [log["type"] for log in logs] == ["typing"]
+    assert logs[0]["details"]["count"] == 3
+    assert isinstance(logs[0]["captureLatency"], int)
@@ -0,0 +1,69 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+
+import pytest
+
+from userale.mining import SequenceMiner
+from userale.reader import logs
+
+
+def log(session, type, target="okButton"):
+    return {"session": session, "type": type, "target": target}
+
+
+@pytest.fixture
+def damaged(tmpdir):
+    path = str(tmpdir.join("userale.log"))
+    with open(path, "w") as f:
+        f.write(json.dumps([log("a", "mousedown"), log("a", "mouseup")]))
+        f.write("\ngarbage\n")
+        f.write(json.dumps([log("a", "click")]) + "\n")
+        f.write('[{"session": "a", "ty')
+    return path
+
+
+def test_bad_lines_are_skipped(damaged):
+    skipped = []
+    assert [entry["type"] for entry in logs(damaged, skipped)] == \
+        ["mousedown", "mouseup", "click"]
+    assert skipped == [2, 4]
+
+    miner = SequenceMiner(n=2)
+    miner.add_all([damaged])
+    assert miner.skipped == 2
+    assert miner.ngrams.total == 2
+
+
+def test_idle_sessions_are_evicted():
+    miner = SequenceMiner(n=2, sessions=3)
+    for session in range(1000):
+        miner.add(log(session, "mousedown"))
+        miner.add(log(session, "mouseup"))
+    assert list(miner.windows) == [997, 998, 999]
+    assert miner.ngrams.total == 1000
+
+    # Seeing a session again keeps it
+    miner.add(log(997, "click"))
+    miner.add(log(1000, "click"))
+    assert list(miner.windows) == [999, 997, 1000]
+
+
+def test_columnar_skips_bad_lines(damaged, tmpdir):
+    columnar = pytest.importorskip("userale.columnar")
+    table = columnar.load(damaged, cache=str(tmpdir.join("cache")))
+    assert len(table) == 3
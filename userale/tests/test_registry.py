@@ -0,0 +1,59 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QPushButton, QWidget
+
+from userale.registry import AleRegistry
+from userale.tests import written
+
+SHUTOFF = ["mouseenter", "mouseleave", "move", "resize"]
+
+
+def test_every_instance_describes_the_target(app, make_ale, tmpdir):
+    first = make_ale(output=str(tmpdir.join("first.log")), resolution=0,
+                     shutoff=SHUTOFF)
+    second = make_ale(output=str(tmpdir.join("second.log")), resolution=50,
+                      shutoff=SHUTOFF, context=True)
+    registry = AleRegistry([first, second])
+    window = QWidget()
+    window.setObjectName("win")
+    button = QPushButton("Go", window)
+    button.setObjectName("goButton")
+    button.setMouseTracking(True)
+    window.show()
+    QTest.qWaitForWindowExposed(window)
+    button.installEventFilter(registry)
+
+    app.sendEvent(button, QMouseEvent(QEvent.MouseMove, QPointF(5, 5),
+                                      Qt.NoButton, Qt.NoButton,
+                                      Qt.NoModifier))
+    QTest.mouseClick(button, Qt.LeftButton)
+    button.removeEventFilter(registry)
+    for ale in (first, second):
+        ale.aggregate()
+        ale.dump()
+
+    expected = ["mousedown", "mousemove", "mouseup"]
+    for ale in (first, second):
+        logs = written(ale)
+        assert sorted(log["type"] for log in logs) == expected
+        for log in logs:
+            assert log["target"] == "goButton"
+            assert log["path"] == ["win", "goButton"]
+    assert all(log["context"]["text"] == "Go" for log in written(second))
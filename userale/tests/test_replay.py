@@ -0,0 +1,54 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+
+import pytest
+
+from userale.replay import main
+
+PATH = ["win", "edit"]
+
+
+@pytest.fixture
+def recording(tmpdir):
+    path = str(tmpdir.join("recording.log"))
+    logs = []
+    for i in range(10):
+        for type in ("keypress", "keyrelease"):
+            logs.append({"type": type, "target": "edit", "path": PATH,
+                         "clientTime": 1000 + 2 * i + len(logs) % 2})
+    with open(path, "w") as f:
+        f.write(json.dumps(logs) + "\n")
+    return path
+
+
+def test_key_events_are_replayed(app, recording, tmpdir, capsys):
+    output = str(tmpdir.join("replay.log"))
+    main([recording, "--speed", "0", "--keylog", "--output", output])
+    report = json.loads(capsys.readouterr().out)
+    assert report["events"]["replayed"] == 20
+    assert report["accepted"] == {"keypress": 10, "keyrelease": 10}
+    assert report["written"] == {"keypress": 10, "keyrelease": 10}
+    assert report["lost"] == 0
+
+
+def test_existing_output_is_kept(app, recording, tmpdir):
+    output = tmpdir.join("replay.log")
+    output.write("kept\n")
+    with pytest.raises(SystemExit):
+        main([recording, "--speed", "0", "--output", str(output)])
+    assert output.read() == "kept\n"
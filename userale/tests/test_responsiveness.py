@@ -0,0 +1,56 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QPushButton
+
+from userale.tests import written
+
+
+def test_stall_with_context(app, make_ale):
+    ale = make_ale(context=True, responsiveness=100)
+    button = QPushButton("Go")
+    button.show()
+    QTest.qWaitForWindowExposed(button)
+    app.installEventFilter(ale)
+    try:
+        QTest.mouseClick(button, Qt.LeftButton)
+        QTest.qWait(100)
+        # Block the event loop past the threshold
+        time.sleep(0.3)
+        QTest.qWait(100)
+    finally:
+        app.removeEventFilter(ale)
+    ale.dump()
+
+    logs = dict((log["type"], log) for log in written(ale))
+    assert logs["mousedown"]["context"]["text"] == "Go"
+    assert logs["stall"]["context"] is None
+    assert logs["stall"]["details"]["duration"] >= 200
+    assert logs["responsiveness"]["context"] is None
+
+
+def test_cleanup_stops_monitor(app, make_ale):
+    ale = make_ale(responsiveness=100)
+    thread = ale.monitor.thread
+    assert thread.is_alive()
+
+    ale.cleanup()
+    assert not thread.is_alive()
+    assert ale.monitor.timer is None
@@ -0,0 +1,73 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from PyQt5.QtCore import QEvent, QPointF, Qt
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QWidget
+
+from userale.ale import Ale
+from userale.tests import written
+
+# Time in ms watched after the burst is written. An idle timer would
+# fire within the smallest of the resolution and interval.
+IDLE = 1000
+
+
+def move(app, widget, x):
+    app.sendEvent(widget, QMouseEvent(QEvent.MouseMove, QPointF(x, 5),
+                                      Qt.NoButton, Qt.NoButton,
+                                      Qt.NoModifier))
+
+
+def test_idle_minute_costs_no_wakeup(app, make_ale, monkeypatch):
+    wakeups = []
+    wakeup = Ale._Ale__wakeup
+    monkeypatch.setattr(Ale, '_Ale__wakeup',
+                        lambda self: (wakeups.append(1), wakeup(self)))
+
+    ale = make_ale(resolution=50, interval=300)
+    widget = QWidget()
+    widget.setMouseTracking(True)
+    widget.show()
+    ale.install(widget)
+    for x in range(100):
+        move(app, widget, x)
+
+    # One wakeup samples the burst, one writes it
+    QTest.qWait(500)
+    assert len(wakeups) == 2
+    assert [log['type'] for log in written(ale)] == ['mousemove']
+
+    # Nothing is pending, so nothing is armed for the rest of the minute
+    assert ale.aggregateDeadline is None
+    assert ale.dumpDeadline is None
+    assert not ale.timer.isActive()
+    QTest.qWait(IDLE)
+    assert len(wakeups) == 2
+
+
+def test_timer_created_on_first_record(app, make_ale):
+    ale = make_ale(resolution=50, interval=300)
+    widget = QWidget()
+    widget.setMouseTracking(True)
+    widget.show()
+    ale.install(widget)
+    assert ale.timer is None
+
+    move(app, widget, 1)
+    assert ale.timer.isActive()
+    assert ale.timer.remainingTime() <= 50
@@ -0,0 +1,83 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import os
+import subprocess
+import sys
+
+from userale.record import LogEvent
+
+HOST = """
+from PyQt5.QtCore import Qt
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication, QPushButton
+from userale.ale import Ale
+
+app = QApplication([])
+ale = Ale(output={output!r}, interval=10, resolution=0, daemon={daemon})
+button = QPushButton("Go")
+button.show()
+ale.install(button)
+QTest.mouseClick(button, Qt.LeftButton)
+QTest.qWait(100)
+print("alive")
+"""
+
+
+def record(i):
+    data = LogEvent(None, "click", i, i, i)
+    data.target, data.path = "goButton", ["goButton"]
+    return data
+
+
+def host(output, daemon=False):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    script = HOST.format(output=output, daemon=daemon)
+    return subprocess.run([sys.executable, "-c", script], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def test_unwritable_output_does_not_abort(tmpdir):
+    output = str(tmpdir.join("missing", "userale.log"))
+    for daemon in (False, True):
+        result = host(output, daemon)
+        assert result.returncode == 0
+        assert "alive" in result.stdout
+        assert result.stderr.count("userale: cannot write to") >= 1
+
+
+def test_unwritten_logs_are_spilled(app, make_ale, tmpdir, capsys):
+    ale = make_ale(output=str(tmpdir.join("missing", "userale.log")),
+                   spill=str(tmpdir.join("userale.spill")))
+    ale.logs.extend(record(i) for i in range(3))
+    assert ale.dump() == (0, 3)
+    ale.logs.extend(record(i) for i in range(3, 5))
+    assert ale.dump() == (0, 2)
+    # Reported once
+    assert capsys.readouterr().err.count("cannot write") == 1
+
+
+def test_unspillable_logs_are_kept(app, make_ale, tmpdir):
+    missing = tmpdir.join("missing")
+    ale = make_ale(output=str(missing.join("userale.log")))
+    ale.logs.extend(record(i) for i in range(3))
+    assert ale.dump() == (0, 0)
+    assert len(ale.logs) == 3
+
+    missing.mkdir()
+    assert ale.dump() == (3, 0)
+    assert not ale.logs
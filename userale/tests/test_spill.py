@@ -0,0 +1,59 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+
+from userale.record import LogEvent
+from userale.spill import load
+from userale.tests import written
+
+BACKLOG = 100000
+
+
+def test_spill_is_cheap(make_ale):
+    ale = make_ale(deadline=10)
+    for i in range(BACKLOG):
+        record = LogEvent(None, "mousemove", i, i, i)
+        record.target, record.path = "goButton", ["win", "goButton"]
+        ale.logs.append(record)
+
+    start = time.perf_counter()
+    count, spilled = ale.cleanup()
+    elapsed = (time.perf_counter() - start) * 1000.0
+    assert spilled > 0 and count + spilled == BACKLOG
+    assert elapsed < 500.0
+
+    logs = written(ale) + list(load(ale.spill))
+    assert [log["clientTime"] for log in logs] == list(range(BACKLOG))
+    # Spilled logs read back as if they had been written
+    assert logs[-1] == dict(logs[0], clientTime=BACKLOG - 1,
+                            location={"x": BACKLOG - 1, "y": BACKLOG - 1})
+
+
+def test_spill_is_data_only(make_ale):
+    ale = make_ale(deadline=0)
+    record = LogEvent(None, "click", 1, 2, 3, {"button": "left"})
+    record.target, record.path = "goButton", ["win", "goButton"]
+    ale.logs.append(record)
+    assert ale.dump(deadline=0) == (0, 1)
+
+    with open(ale.spill, "ab") as f:
+        f.write(b'[{"fields": {}}, [[1]')
+    logs = list(load(ale.spill))
+    assert len(logs) == 1
+    assert logs[0]["details"] == {"button": "left"}
+    assert logs[0]["location"] == {"x": 2, "y": 3}
+    assert logs[0]["session"] == ale.session
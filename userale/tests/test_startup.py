@@ -0,0 +1,81 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import compileall
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Budgets in ms. PyQt5 itself is excluded, the instrumented application
+# imports it anyway.
+IMPORT_BUDGET = 20.0
+CONSTRUCT_BUDGET = 2.0
+
+
+def import_time(runs=5):
+    """
+    :param runs: [int] Number of fresh interpreters to measure.
+    :return: [float] Best cumulative import time of userale.ale in ms, \
+    or None if the interpreter did not report it.
+    """
+
+    # Byte-compile first, so that the budget does not cover compiling the
+    # sources when bytecode writing is disabled
+    compileall.compile_dir(os.path.dirname(os.path.dirname(__file__)),
+                           quiet=1)
+    best = None
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import PyQt5.QtCore; import userale.ale'],
+            stderr=subprocess.PIPE, universal_newlines=True).stderr
+        for line in out.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == 'userale.ale':
+                us = int(fields[1])
+                best = us if best is None else min(best, us)
+    return best / 1000.0 if best is not None else None
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="-X importtime requires Python 3.7")
+def test_import_budget():
+    elapsed = import_time()
+    if elapsed is None:
+        pytest.skip("import time of userale.ale not reported")
+    assert elapsed <= IMPORT_BUDGET
+
+
+def test_construct_budget(app, make_ale):
+    # Warm up the lazy class setup of PyQt5
+    make_ale()
+    runs = 100
+    start = time.perf_counter()
+    for _ in range(runs):
+        make_ale()
+    assert (time.perf_counter() - start) * 1000.0 / runs <= CONSTRUCT_BUDGET
+
+
+def test_lazy_setup(app, make_ale):
+    ale = make_ale()
+    assert ale.sinks is None
+    assert ale.batch is None
+    assert ale.timer is None
+    assert ale.keys is None
+    assert ale._Ale__session is None